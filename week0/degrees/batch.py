@@ -0,0 +1,122 @@
+"""
+Batch one-to-many degrees queries.
+
+    $ python batch.py directory queries.jsonl [--processes N]
+
+Each line of the query file (or stdin for "-") is a JSON object
+    {"source": person_id, "targets": [person_id, ...]}
+and every source is answered with a single breadth-first search. Sources
+are spread across a process pool which shares the graph loaded by the
+parent process. One JSON line is written to stdout per (source, target):
+    {"source": ..., "target": ..., "degrees": n,
+     "path": [[movie_id, person_id], ...], "explored": n}
+with "degrees" and "path" null when the two are not connected, and
+"explored" the number of people the search for that source explored.
+A source or target that is not in the data gets a line
+    {"source": ..., "target": ..., "error": "unknown person ..."}
+instead, and the other targets of the query are still answered. A query
+without a source and a list of targets gets a single line
+    {"query": ..., "error": "malformed query"}
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+
+import degrees
+
+
+def init_worker(directory, compact, snapshot):
+    """
+    Loads the data in a worker unless it was inherited from the parent.
+    """
+    if not degrees.people:
+        degrees.load_data(directory, compact=compact, snapshot=snapshot)
+
+
+def answer(query):
+    """
+    Returns the result lines for one {"source", "targets"} query.
+    """
+    if (not isinstance(query, dict) or "source" not in query
+            or not isinstance(query.get("targets"), list)):
+        return [{"query": query, "error": "malformed query"}]
+    source = query["source"]
+    targets = query["targets"]
+    if source not in degrees.people:
+        return [{"source": source, "target": target,
+                 "error": f"unknown person {source}"} for target in targets]
+    paths, num_explored = degrees.paths_from(source, targets)
+    results = []
+    for target in targets:
+        if target not in degrees.people:
+            results.append({"source": source, "target": target,
+                            "error": f"unknown person {target}"})
+            continue
+        path = paths[target]
+        results.append({
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path,
+            "explored": num_explored
+        })
+    return results
+
+
+def run_batch(queries, directory, processes=None, compact=False,
+              snapshot=False):
+    """
+    Yields result dicts for an iterable of queries, in query order.
+
+    The data must already be loaded with the same arguments. Workers are
+    forked where possible so they share it instead of loading their own.
+    """
+    if processes == 1:
+        for query in queries:
+            yield from answer(query)
+        return
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "fork" if "fork" in methods else None
+    )
+    with context.Pool(processes, initializer=init_worker,
+                      initargs=(directory, compact, snapshot)) as pool:
+        for results in pool.imap(answer, queries, chunksize=16):
+            yield from results
+
+
+def read_queries(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("queries", help="JSON lines file, or - for stdin")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--compact", action="store_true",
+                        help="use the integer-indexed graph store")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="memory-map the graph from a binary snapshot")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=args.compact,
+                      snapshot=args.snapshot)
+
+    f = sys.stdin if args.queries == "-" else open(args.queries,
+                                                   encoding="utf-8")
+    with f:
+        for result in run_batch(read_queries(f), args.directory,
+                                args.processes, args.compact, args.snapshot):
+            print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
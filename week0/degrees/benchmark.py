@@ -0,0 +1,118 @@
+"""
+Benchmark suite for degrees.
+
+    $ python benchmark.py [--sizes ROWS ...] [--modes dict compact ...]
+                          [--queries N] [--output results.jsonl]
+
+For every size a synthetic dataset is generated (see generate.py), then
+each load mode is measured in a fresh process: time to load_data, time of
+single-pair searches between random people (single-ended and
+bidirectional) and the memory high-water mark. One JSON object is written
+per (size, mode), to stdout and optionally appended to `--output`, so
+results can be tracked across commits.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import degrees
+from generate import generate
+
+MODES = ["dict", "compact", "snapshot", "parallel"]
+
+
+def measure(directory, mode, queries, seed):
+    """
+    Loads `directory` in `mode` and returns a dict of measurements.
+    Runs in its own process so the memory high-water mark is its own.
+    """
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=mode == "compact",
+                      snapshot=mode == "snapshot",
+                      processes=os.cpu_count() if mode == "parallel" else None)
+    load = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    pairs = [(rng.choice(person_ids), rng.choice(person_ids))
+             for _ in range(queries)]
+
+    results = {"load_seconds": load}
+    for name, bidirectional in [("bfs", False), ("bidirectional", True)]:
+        seconds = []
+        explored = 0
+        for source, target in pairs:
+            start = time.perf_counter()
+            _, num_explored = degrees.search(source, target, bidirectional)
+            seconds.append(time.perf_counter() - start)
+            explored += num_explored
+        seconds.sort()
+        results[f"{name}_median_seconds"] = seconds[len(seconds) // 2]
+        results[f"{name}_max_seconds"] = seconds[-1]
+        results[f"{name}_mean_explored"] = explored / len(pairs)
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["peak_rss_bytes"] = peak if sys.platform == "darwin" \
+        else peak * 1024
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000],
+                        help="star rows of each synthetic dataset")
+    parser.add_argument("--modes", nargs="+", choices=MODES,
+                        default=["dict", "compact"])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also append results here")
+    parser.add_argument("--measure", nargs=2, metavar=("DIRECTORY", "MODE"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child process: measure a single dataset and mode
+    if args.measure is not None:
+        directory, mode = args.measure
+        print(json.dumps(measure(directory, mode, args.queries, args.seed)))
+        return
+
+    for size in args.sizes:
+        directory = tempfile.mkdtemp(prefix="degrees-benchmark-")
+        try:
+            start = time.perf_counter()
+            people, movies, stars = generate(directory, size, seed=args.seed)
+            generated = time.perf_counter() - start
+            for mode in args.modes:
+                child = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__),
+                     "--measure", directory, mode,
+                     "--queries", str(args.queries), "--seed", str(args.seed)],
+                    capture_output=True, text=True, check=True
+                )
+                result = {
+                    "size": size, "mode": mode, "people": people,
+                    "movies": movies, "stars": stars,
+                    "generate_seconds": generated,
+                    **json.loads(child.stdout.splitlines()[-1])
+                }
+                line = json.dumps(result)
+                print(line, flush=True)
+                if args.output is not None:
+                    with open(args.output, "a") as f:
+                        f.write(line + "\n")
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Microbenchmark of the frontiers in util.py against the original
+list-based implementation.
+
+    $ python benchmark_frontier.py [size]
+
+Fills a frontier with `size` nodes (default one million), checks
+contains_state for a sample of states and drains it again. The list-based
+frontiers are quadratic, so they are only timed on a prefix and their
+total is extrapolated from it.
+"""
+
+import sys
+import time
+
+from util import Node, StackFrontier, QueueFrontier
+
+
+class ListStackFrontier():
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[-1]
+            self.frontier = self.frontier[:-1]
+            return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+def run(frontier_class, size, lookups, limit=None):
+    """
+    Returns seconds spent adding, looking up and removing nodes.
+    With `limit`, only that many removals are timed and the total
+    removal time is extrapolated (removal cost is linear in size).
+    """
+    frontier = frontier_class()
+    nodes = [Node(state=i, parent=None, action=None) for i in range(size)]
+
+    start = time.perf_counter()
+    for node in nodes:
+        frontier.add(node)
+    added = time.perf_counter()
+
+    step = max(1, size // lookups)
+    for state in range(0, size, step):
+        frontier.contains_state(state)
+    looked_up = time.perf_counter()
+
+    removals = size if limit is None else min(limit, size)
+    for _ in range(removals):
+        frontier.remove()
+    removed = time.perf_counter()
+
+    # Each list removal copies the remaining nodes, so the first removals
+    # cost about `size` each and all of them about size ** 2 / 2
+    removal = removed - looked_up
+    if removals < size:
+        removal *= size / (2 * removals)
+    return added - start, looked_up - added, removal
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark_frontier.py [size]")
+    size = int(sys.argv[1]) if len(sys.argv) == 2 else 1_000_000
+    lookups = 100
+
+    print(f"Frontier of {size} nodes, {lookups} contains_state lookups")
+    print(f"{'frontier':<20}{'add':>12}{'contains':>12}{'remove':>12}")
+    for frontier_class, limit in [
+        (QueueFrontier, None),
+        (StackFrontier, None),
+        (ListQueueFrontier, 1000),
+        (ListStackFrontier, 1000),
+    ]:
+        add, contains, remove = run(frontier_class, size, lookups, limit)
+        estimate = "~" if limit is not None and limit < size else ""
+        remove = f"{estimate}{remove:.3f}s"
+        print(f"{frontier_class.__name__:<20}{add:>11.3f}s{contains:>11.3f}s"
+              f"{remove:>12}")
+
+
+if __name__ == "__main__":
+    main()
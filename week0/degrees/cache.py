@@ -0,0 +1,182 @@
+"""
+Result cache and hub BFS trees for degrees queries.
+
+QueryCache keeps a bounded LRU of (source, target) results, looked up in
+either direction, and the full breadth-first parent trees of the most
+frequently queried people ("hubs"). Any query with a hub at either end
+is answered by walking the hub's parent pointers instead of searching.
+Query counts are only kept for the most queried people, so the cache
+stays bounded however many different people are queried.
+"""
+
+import sys
+from collections import Counter, OrderedDict
+
+import degrees
+
+
+class QueryCache():
+
+    def __init__(self, maxsize=1024, hubs=8, hub_threshold=3, counted=None):
+        """
+        Initialize an empty cache.
+            - `maxsize`: most (source, target) results kept
+            - `hubs`: most BFS trees kept
+            - `hub_threshold`: queries touching a person before it
+              qualifies for a tree
+            - `counted`: people whose query counts are kept once the
+              counts are pruned (default: 2 * `maxsize`)
+        """
+        self.maxsize = maxsize
+        self.hubs = hubs
+        self.hub_threshold = hub_threshold
+        self.counted = 2 * maxsize if counted is None else counted
+
+        # Maps (source, target) to (path, size in bytes)
+        self.results = OrderedDict()
+        # Maps a hub to (parents, size in bytes)
+        self.trees = {}
+        # Number of queries each person appeared in, pruned to the
+        # `counted` most queried people once it holds twice as many
+        self.queries = Counter()
+
+        self.hits = 0
+        self.tree_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.tree_evictions = 0
+        self.result_bytes = 0
+        self.tree_bytes = 0
+
+    def get(self, source, target):
+        """
+        Returns (True, path) if the answer is cached, else (False, None).
+        A cached path may be None if the two are not connected.
+        """
+        self.queries[source] += 1
+        self.queries[target] += 1
+        if len(self.queries) > 2 * max(self.counted, self.hubs):
+            self.prune_queries()
+
+        for key, reverse in [((source, target), False),
+                             ((target, source), True)]:
+            if key in self.results:
+                self.results.move_to_end(key)
+                self.hits += 1
+                path = self.results[key][0]
+                if reverse and path is not None:
+                    path = degrees.reverse_path(target, path)
+                return True, path
+
+        if source in self.trees:
+            self.tree_hits += 1
+            return True, degrees.path_to(self.trees[source][0], target)
+        if target in self.trees:
+            self.tree_hits += 1
+            path = degrees.path_to(self.trees[target][0], source)
+            if path is not None:
+                path = degrees.reverse_path(target, path)
+            return True, path
+
+        self.misses += 1
+        return False, None
+
+    def prune_queries(self):
+        """
+        Drops the query counts of all but the `counted` most queried
+        people, keeping those of the hubs.
+        """
+        kept = Counter(dict(self.queries.most_common(self.counted)))
+        for hub in self.trees:
+            kept[hub] = self.queries[hub]
+        self.queries = kept
+
+    def put(self, source, target, path):
+        """
+        Stores the result of a search, evicting the least recently used
+        results beyond `maxsize`.
+        """
+        key = (source, target)
+        if key in self.results:
+            self.result_bytes -= self.results.pop(key)[1]
+        size = sys.getsizeof(key) + sys.getsizeof(path)
+        if path is not None:
+            size += sum(sys.getsizeof(step) for step in path)
+        self.results[key] = (path, size)
+        self.result_bytes += size
+
+        while len(self.results) > self.maxsize:
+            _, (_, size) = self.results.popitem(last=False)
+            self.result_bytes -= size
+            self.evictions += 1
+
+    def hub_candidates(self):
+        """
+        Returns the people who should get a BFS tree: queried at least
+        `hub_threshold` times and more often than the least queried hub.
+        """
+        candidates = []
+        least = min((self.queries[hub] for hub in self.trees), default=0)
+        for person_id, count in self.queries.most_common(self.hubs):
+            if count < self.hub_threshold:
+                break
+            if person_id in self.trees:
+                continue
+            if len(self.trees) < self.hubs or count > least:
+                candidates.append(person_id)
+        return candidates
+
+    def add_tree(self, source, parents):
+        """
+        Stores the BFS parent tree of source, evicting the least
+        queried hub if there are more than `hubs` trees.
+        """
+        if source in self.trees:
+            self.tree_bytes -= self.trees.pop(source)[1]
+        size = sys.getsizeof(parents) + sum(
+            sys.getsizeof(parent) for parent in parents.values()
+        )
+        self.trees[source] = (parents, size)
+        self.tree_bytes += size
+
+        while len(self.trees) > self.hubs:
+            hub = min(self.trees, key=lambda hub: self.queries[hub])
+            self.tree_bytes -= self.trees.pop(hub)[1]
+            self.tree_evictions += 1
+
+    def search(self, source, target, bidirectional=False):
+        """
+        Returns (path, num_explored) like degrees.search, answering from
+        the cache where possible and building trees for new hubs.
+        """
+        found, path = self.get(source, target)
+        if found:
+            return path, 0
+        path, num_explored = degrees.search(source, target, bidirectional)
+        self.put(source, target, path)
+        for hub in self.hub_candidates():
+            self.add_tree(hub, degrees.bfs_parents(hub)[0])
+        return path, num_explored
+
+    def stats(self):
+        """
+        Returns a dict of cache counters.
+        """
+        lookups = self.hits + self.tree_hits + self.misses
+        return {
+            "hits": self.hits,
+            "tree_hits": self.tree_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.tree_hits) / lookups
+            if lookups else 0.0,
+            "evictions": self.evictions,
+            "tree_evictions": self.tree_evictions,
+            "results": len(self.results),
+            "trees": len(self.trees),
+            "result_bytes": self.result_bytes,
+            "tree_bytes": self.tree_bytes,
+            "counted": len(self.queries),
+            "query_bytes": sys.getsizeof(self.queries),
+            "memory_bytes": (self.result_bytes + self.tree_bytes
+                             + sys.getsizeof(self.queries))
+        }
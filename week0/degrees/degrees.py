@@ -1,6 +1,12 @@
+import argparse
 import csv
 import sys
+from collections import deque
 
+from graph import load_graph
+from ingest import ingest, report
+from name_index import POLICIES, build_name_index
+from snapshot import open_snapshot
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,11 +18,43 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact graph store, only set when loaded with compact=True
+graph = None
 
-def load_data(directory):
+# NameIndex over people, built on first non-interactive name lookup
+name_index = None
+
+
+def load_data(directory, compact=False, snapshot=False, processes=None):
     """
     Load data from CSV files into memory.
+
+    With `processes`, the CSV files are parsed in parallel by that many
+    worker processes and the ingest statistics are returned.
+
+    With `compact`, the data is held in an integer-indexed Graph and
+    `names`, `people` and `movies` become read-only views onto it.
+    With `snapshot`, that Graph is memory-mapped from the binary snapshot
+    of the directory, which is (re)built first if missing or stale.
     """
+    global names, people, movies, graph, name_index
+    names, people, movies = {}, {}, {}
+    graph = None
+    name_index = None
+    if compact or snapshot:
+        if snapshot:
+            graph = open_snapshot(directory)
+        else:
+            graph = load_graph(directory)
+        names = graph.names_index
+        people = graph.people
+        movies = graph.movies
+        return
+
+    if processes is not None:
+        people, movies, names, stats = ingest(directory, processes)
+        return stats
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -53,23 +91,53 @@ def load_data(directory):
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [directory] [--compact] [--snapshot] "
+              "[--processes N] [--policy POLICY] "
+              "[--bidirectional | --compare]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="use the integer-indexed graph store")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="memory-map the graph from a binary snapshot")
+    parser.add_argument("--processes", type=int,
+                        help="parse the CSV files with worker processes")
+    parser.add_argument("--policy", choices=POLICIES,
+                        help="resolve names without prompting")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--bidirectional", action="store_true",
+                      help="search from both people at once")
+    mode.add_argument("--compare", action="store_true",
+                      help="run both searches and compare explored steps")
+    args = parser.parse_args()
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    stats = load_data(args.directory, compact=args.compact,
+                      snapshot=args.snapshot, processes=args.processes)
+    if stats is not None:
+        report(stats)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    source = person_id_for_name(input("Name: "), args.policy)
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    target = person_id_for_name(input("Name: "), args.policy)
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.compare:
+        path, num_explored = search(source, target)
+        print("Explored Steps (breadth-first):", num_explored)
+        other, num_explored = search(source, target, bidirectional=True)
+        print("Explored Steps (bidirectional):", num_explored)
+        if (path is None) != (other is None) or (
+            path is not None and len(path) != len(other)
+        ):
+            sys.exit("Searches disagree on the degrees of separation.")
+    else:
+        path = shortest_path(source, target, args.bidirectional)
 
     if path is None:
         print("Not connected.")
@@ -84,7 +152,7 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
@@ -92,15 +160,29 @@ def shortest_path(source, target):
     If no possible path, returns None.
     """
     print("Searching...")
+    path, num_explored = search(source, target, bidirectional)
+    print("Explored Steps:", num_explored)
+    return path
+
+
+def search(source, target, bidirectional=False):
+    """
+    Returns the shortest path from source to target (or None)
+    together with the number of people explored to find it.
+    """
+    if bidirectional:
+        return bidirectional_search(source, target)
+
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
     frontier.add(start)
     explored = set()
+    seen_movies = set()
     num_explored = 0
 
     while True:
         if frontier.empty():
-            return None
+            return None, num_explored
 
         node = frontier.remove()
         num_explored += 1
@@ -110,13 +192,11 @@ def shortest_path(source, target):
                 actions.append(node.action)
                 node = node.parent
             actions.reverse()
-            solution = actions
-            print("Explored Steps:", num_explored)
-            return solution
+            return actions, num_explored
 
         explored.add(node.state)
 
-        neighbors = neighbors_for_person(node.state)
+        neighbors = unseen_neighbors(node.state, seen_movies)
         for neighbor in neighbors:
             if not frontier.contains_state(neighbor[1]) and neighbor[1] not in explored:
                 child = Node(state=neighbor[1],
@@ -124,11 +204,161 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
-def person_id_for_name(name):
+def bidirectional_search(source, target):
+    """
+    Breadth-first search from both ends at once, always expanding a full
+    layer of whichever side has the smaller frontier.
+
+    Returns a path of the same length as the single-ended search
+    together with the number of people explored on both sides.
+    """
+    if source == target:
+        return [], 1
+
+    # Each side maps a reached person to (movie_id, person_id) of the
+    # person it was reached from, i.e. one step closer to its own root
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    forward_movies = set()
+    backward_movies = set()
+    num_explored = 0
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, others = forward_frontier, forward, backward
+            seen_movies = forward_movies
+        else:
+            frontier, parents, others = backward_frontier, backward, forward
+            seen_movies = backward_movies
+
+        # Expand the whole layer, collecting every person both sides reached
+        layer = []
+        meetings = []
+        for person_id in frontier:
+            num_explored += 1
+            for movie_id, neighbor in unseen_neighbors(person_id,
+                                                       seen_movies):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie_id, person_id)
+                layer.append(neighbor)
+                if neighbor in others:
+                    meetings.append(neighbor)
+
+        if meetings:
+            paths = [join_paths(forward, backward, meeting)
+                     for meeting in meetings]
+            return min(paths, key=len), num_explored
+
+        if frontier is forward_frontier:
+            forward_frontier = layer
+        else:
+            backward_frontier = layer
+
+    return None, num_explored
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Returns the (movie_id, person_id) path from the root of `forward`
+    to the root of `backward` through the person `meeting`.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, previous = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, person_id = backward[person_id]
+        path.append((movie_id, person_id))
+    return path
+
+
+def paths_from(source, targets):
+    """
+    Runs a single breadth-first search from source and returns a dict
+    mapping each of the targets to its shortest path (or None),
+    together with the number of people explored.
+
+    The search stops as soon as every target has been reached.
+    """
+    parents, num_explored = bfs_parents(source, targets)
+    paths = {target: path_to(parents, target) for target in targets}
+    return paths, num_explored
+
+
+def bfs_parents(source, targets=None):
+    """
+    Breadth-first search from source, returning a dict mapping every
+    reached person to the (movie_id, person_id) they were reached from
+    (None for the source) and the number of people explored.
+
+    With `targets`, the search stops once all of them are reached.
+    Targets that are not in the data are ignored, as they can never be.
+    """
+    parents = {source: None}
+    remaining = None
+    if targets is not None:
+        remaining = {target for target in targets
+                     if target in people} - {source}
+    queue = deque([source])
+    seen_movies = set()
+    num_explored = 0
+
+    while queue and (remaining is None or remaining):
+        person_id = queue.popleft()
+        num_explored += 1
+        for movie_id, neighbor in unseen_neighbors(person_id, seen_movies):
+            if neighbor not in parents:
+                parents[neighbor] = (movie_id, person_id)
+                if remaining is not None:
+                    remaining.discard(neighbor)
+                queue.append(neighbor)
+
+    return parents, num_explored
+
+
+def path_to(parents, target):
+    """
+    Returns the path to target by walking parent pointers from
+    bfs_parents, or None if target was not reached.
+    """
+    if target not in parents:
+        return None
+    path = []
+    person_id = target
+    while parents[person_id] is not None:
+        movie_id, previous = parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous
+    path.reverse()
+    return path
+
+
+def reverse_path(source, path):
+    """
+    Returns the path from the end of `path` back to source.
+    """
+    people = [source] + [person_id for _, person_id in path]
+    return [(path[i][0], people[i]) for i in reversed(range(len(path)))]
+
+
+def person_id_for_name(name, policy=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Ambiguities are resolved by prompting, or without prompting by the
+    NameIndex.resolve `policy` ("unique", "popular" or "fuzzy").
     """
+    if policy is not None:
+        return get_name_index().resolve(name, policy)
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
@@ -150,11 +380,23 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def get_name_index():
+    """
+    Returns the NameIndex over the loaded people, building it if needed.
+    """
+    global name_index
+    if name_index is None:
+        name_index = build_name_index(people, graph)
+    return name_index
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -163,5 +405,27 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def unseen_neighbors(person_id, seen_movies):
+    """
+    Yields (movie_id, person_id) pairs for people who starred with a
+    given person in movies not yet in `seen_movies`, adding those movies
+    to it, so a search scans each movie's cast at most once.
+    """
+    if graph is not None:
+        movie_ids = graph.movies_for_person(person_id)
+    else:
+        movie_ids = people[person_id]["movies"]
+    for movie_id in movie_ids:
+        if movie_id in seen_movies:
+            continue
+        seen_movies.add(movie_id)
+        if graph is not None:
+            stars = graph.stars_for_movie(movie_id)
+        else:
+            stars = movies[movie_id]["stars"]
+        for star in stars:
+            yield movie_id, star
+
+
 if __name__ == "__main__":
     main()
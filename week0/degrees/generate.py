@@ -0,0 +1,101 @@
+"""
+Synthetic dataset generator for degrees.
+
+    $ python generate.py directory STARS [--people N] [--seed S]
+
+Writes people.csv, movies.csv and stars.csv with about STARS star rows.
+Cast sizes follow a truncated power law (most movies have a handful of
+stars, a few have hundreds) and so does how often each person is cast,
+which gives the hubs and long tail of the real IMDb data.
+"""
+
+import argparse
+import os
+import random
+
+SYLLABLES = ["an", "bel", "cor", "da", "el", "fin", "gar", "ha", "is", "jo",
+             "ka", "lu", "mar", "na", "or", "pe", "qu", "ro", "sa", "ti",
+             "ul", "va", "wen", "xa", "yo", "zel"]
+
+
+def cast_size(rng, exponent, smallest, largest):
+    """
+    Returns a cast size from a power law with the given exponent,
+    truncated to [smallest, largest].
+    """
+    size = smallest * (1 - rng.random()) ** (-1 / (exponent - 1))
+    return min(largest, int(size))
+
+
+def name(rng):
+    """
+    Returns a random two-part name.
+    """
+    first = "".join(rng.choices(SYLLABLES, k=rng.randint(1, 3)))
+    last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+    return f"{first.title()} {last.title()}"
+
+
+def generate(directory, stars, people=None, seed=0, exponent=2.5,
+             smallest=2, largest=500, skew=2.0, dangling=0.0):
+    """
+    Writes a synthetic dataset with `stars` star rows to `directory`
+    and returns the number of people, movies and star rows written.
+        - `people`: number of people, by default a quarter of `stars`
+        - `exponent`, `smallest`, `largest`: cast size distribution
+        - `skew`: how strongly casting favours low person ids
+        - `dangling`: fraction of star rows naming unknown people
+    """
+    rng = random.Random(seed)
+    people = people if people is not None else max(1, stars // 4)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8") as f:
+        f.write("id,name,birth\n")
+        for person in range(people):
+            f.write(f'{person},"{name(rng)}",{rng.randint(1900, 2005)}\n')
+
+    movies = 0
+    written = 0
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8") as f:
+        f.write("person_id,movie_id\n")
+        while written < stars:
+            size = min(cast_size(rng, exponent, smallest, largest),
+                       stars - written, people)
+            cast = set()
+            while len(cast) < size:
+                cast.add(int(people * rng.random() ** skew))
+            for person in cast:
+                if dangling and rng.random() < dangling:
+                    person += people
+                f.write(f"{person},{movies}\n")
+            written += size
+            movies += 1
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8") as f:
+        f.write("id,title,year\n")
+        for movie in range(movies):
+            f.write(f'{movie},"Movie {movie}",{rng.randint(1920, 2020)}\n')
+
+    return people, movies, written
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("stars", type=int, help="number of star rows")
+    parser.add_argument("--people", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    people, movies, stars = generate(args.directory, args.stars,
+                                     args.people, args.seed)
+    print(f"Wrote {people} people, {movies} movies and {stars} star rows "
+          f"to {args.directory}.")
+
+
+if __name__ == "__main__":
+    main()
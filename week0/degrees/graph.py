@@ -0,0 +1,284 @@
+"""
+Compact, integer-indexed store for the degrees dataset.
+
+People and movies are interned to dense integers (their position in the
+list of IDs sorted as strings) and the bipartite star graph is kept as two
+CSR-style adjacency structures: an offsets array plus a flat index array
+for person -> movies and for movie -> stars.
+"""
+
+import csv
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+class Graph():
+
+    def __init__(self, person_ids, names, births, movie_ids, titles, years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 name_order):
+        """
+        Every argument is a sequence indexed by dense integers.
+            - `person_ids`, `movie_ids`: IMDB ids, sorted ascending
+            - `names`, `births`: name and birth year of each person
+            - `titles`, `years`: title and year of each movie
+            - `person_offsets`, `person_movies`: movies of person `i` are
+              `person_movies[person_offsets[i]:person_offsets[i + 1]]`
+            - `movie_offsets`, `movie_stars`: same for stars of a movie
+            - `name_order`: person indexes sorted by lowercase name
+        """
+        self.person_ids = person_ids
+        self.names = names
+        self.births = births
+        self.movie_ids = movie_ids
+        self.titles = titles
+        self.years = years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self.name_order = name_order
+
+        # Dict-like views compatible with the globals in degrees.py
+        self.people = PeopleView(self)
+        self.movies = MoviesView(self)
+        self.names_index = NamesView(self)
+
+    def person_index(self, person_id):
+        """
+        Returns the dense index of a person, or None if unknown.
+        """
+        i = bisect_left(self.person_ids, person_id)
+        if i < len(self.person_ids) and self.person_ids[i] == person_id:
+            return i
+        return None
+
+    def movie_index(self, movie_id):
+        """
+        Returns the dense index of a movie, or None if unknown.
+        """
+        i = bisect_left(self.movie_ids, movie_id)
+        if i < len(self.movie_ids) and self.movie_ids[i] == movie_id:
+            return i
+        return None
+
+    def movies_of(self, person):
+        """
+        Returns the movie indexes a person (by index) starred in.
+        """
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indexes starring in a movie (by index).
+        """
+        offsets = self.movie_offsets
+        return self.movie_stars[offsets[movie]:offsets[movie + 1]]
+
+    def indexes_for_name(self, name):
+        """
+        Returns the person indexes whose name matches `name`,
+        ignoring case.
+        """
+        name = name.lower()
+        names = self.names
+        order = self.name_order
+        i = bisect_left(order, name, key=lambda p: names[p].lower())
+        matches = []
+        while i < len(order) and names[order[i]].lower() == name:
+            matches.append(order[i])
+            i += 1
+        return matches
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        person = self.person_index(person_id)
+        neighbors = set()
+        if person is None:
+            return neighbors
+        for movie in self.movies_of(person):
+            movie_id = self.movie_ids[movie]
+            for star in self.stars_of(movie):
+                neighbors.add((movie_id, self.person_ids[star]))
+        return neighbors
+
+    def movies_for_person(self, person_id):
+        """
+        Returns the movie_ids a person starred in.
+        """
+        person = self.person_index(person_id)
+        if person is None:
+            return []
+        return [self.movie_ids[m] for m in self.movies_of(person)]
+
+    def stars_for_movie(self, movie_id):
+        """
+        Returns the person_ids starring in a movie.
+        """
+        movie = self.movie_index(movie_id)
+        if movie is None:
+            return []
+        return [self.person_ids[p] for p in self.stars_of(movie)]
+
+    def person_id_for_name(self, name):
+        """
+        Returns the IMDB ids of every person with the given name.
+        """
+        return [self.person_ids[p] for p in self.indexes_for_name(name)]
+
+
+class PeopleView(Mapping):
+    """
+    Read-only `people` mapping: person_id -> {"name", "birth", "movies"}.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.names[person],
+            "birth": graph.births[person],
+            "movies": {graph.movie_ids[m] for m in graph.movies_of(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only `movies` mapping: movie_id -> {"title", "year", "stars"}.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.titles[movie],
+            "year": graph.years[movie],
+            "stars": {graph.person_ids[p] for p in graph.stars_of(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only `names` mapping: lowercase name -> set of person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        person_ids = self.graph.person_id_for_name(name)
+        if not person_ids:
+            raise KeyError(name)
+        return set(person_ids)
+
+    def __iter__(self):
+        graph = self.graph
+        previous = None
+        for person in graph.name_order:
+            name = graph.names[person].lower()
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def build_csr(count, sources, targets):
+    """
+    Builds CSR offsets and indexes for `count` sources from parallel
+    arrays of edge endpoints, using a counting sort.
+    """
+    offsets = array("I", bytes(array("I").itemsize * (count + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+    indexes = array("I", bytes(array("I").itemsize * offsets[count]))
+    position = array("I", offsets[:count])
+    for source, target in zip(sources, targets):
+        indexes[position[source]] = target
+        position[source] += 1
+    return offsets, indexes
+
+
+def load_graph(directory):
+    """
+    Loads the CSV files in `directory` into a compact Graph.
+    """
+    # Load people, keyed by id so duplicates keep the last row
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        people = {row["id"]: (row["name"], row["birth"]) for row in reader}
+    person_ids = sorted(people)
+    names = [people[person_id][0] for person_id in person_ids]
+    births = [people[person_id][1] for person_id in person_ids]
+    del people
+
+    # Load movies
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        movies = {row["id"]: (row["title"], row["year"]) for row in reader}
+    movie_ids = sorted(movies)
+    titles = [movies[movie_id][0] for movie_id in movie_ids]
+    years = [movies[movie_id][1] for movie_id in movie_ids]
+    del movies
+
+    # Load stars, dropping rows that reference unknown ids
+    person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+    star_people = array("I")
+    star_movies = array("I")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
+            except KeyError:
+                continue
+            star_people.append(person)
+            star_movies.append(movie)
+    del person_index, movie_index
+
+    person_offsets, person_movies = build_csr(
+        len(person_ids), star_people, star_movies
+    )
+    movie_offsets, movie_stars = build_csr(
+        len(movie_ids), star_movies, star_people
+    )
+    del star_people, star_movies
+
+    name_order = array("I", sorted(range(len(names)),
+                                   key=lambda p: names[p].lower()))
+
+    return Graph(person_ids, names, births, movie_ids, titles, years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 name_order)
@@ -0,0 +1,212 @@
+"""
+Streaming, parallel ingestion of the degrees CSV files.
+
+    $ python ingest.py directory [--processes N]
+    $ python ingest.py --benchmark [ROWS ...]
+
+people.csv and movies.csv are parsed in worker processes while stars.csv
+is split into byte ranges parsed by the remaining workers. The parent
+merges the results into the same `people`, `movies` and `names` dicts
+load_data builds, counting the rows it has to drop instead of silently
+skipping them.
+"""
+
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from generate import generate
+
+# Bytes of stars.csv parsed by one task
+CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def parse_table(path, fields):
+    """
+    Returns the rows of a CSV file as tuples of `fields`,
+    together with the number of malformed rows skipped.
+    """
+    rows = []
+    malformed = 0
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = [header.index(field) for field in fields]
+        for row in reader:
+            if len(row) != len(header) or not row[columns[0]]:
+                malformed += 1
+                continue
+            rows.append(tuple(row[column] for column in columns))
+    return rows, malformed
+
+
+def parse_stars(path, start, end):
+    """
+    Returns the (person_id, movie_id) pairs of the lines of stars.csv
+    starting in the byte range [start, end), together with the number
+    of malformed lines skipped.
+
+    stars.csv only holds numeric ids, so no quoted field can contain
+    a newline and lines can be split at any byte offset.
+    """
+    person_ids = []
+    movie_ids = []
+    malformed = 0
+    with open(path, "rb") as f:
+        if start == 0:
+            f.readline()
+        else:
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            fields = line.decode("utf-8").strip().split(",")
+            if len(fields) != 2 or not fields[0] or not fields[1]:
+                if line.strip():
+                    malformed += 1
+                continue
+            person_ids.append(fields[0].strip('"'))
+            movie_ids.append(fields[1].strip('"'))
+    return person_ids, movie_ids, malformed
+
+
+def ingest(directory, processes=None):
+    """
+    Loads the CSV files in `directory` in parallel.
+
+    Returns `people`, `movies` and `names` dicts shaped like the globals
+    in degrees.py, and a dict of row counts and dropped rows.
+    """
+    start = time.perf_counter()
+    stars_path = os.path.join(directory, "stars.csv")
+    size = os.path.getsize(stars_path)
+    ranges = [(offset, min(offset + CHUNK_SIZE, size))
+              for offset in range(0, size, CHUNK_SIZE)] or [(0, 0)]
+
+    with ProcessPoolExecutor(processes) as executor:
+        people_rows = executor.submit(
+            parse_table, os.path.join(directory, "people.csv"),
+            ["id", "name", "birth"]
+        )
+        movie_rows = executor.submit(
+            parse_table, os.path.join(directory, "movies.csv"),
+            ["id", "title", "year"]
+        )
+        star_chunks = [executor.submit(parse_stars, stars_path, *chunk)
+                       for chunk in ranges]
+
+        stats = {
+            "people": 0, "movies": 0, "stars": 0,
+            "malformed_rows": 0, "duplicate_ids": 0,
+            "dangling_people": 0, "dangling_movies": 0
+        }
+
+        # Load people
+        people = {}
+        names = {}
+        rows, malformed = people_rows.result()
+        stats["malformed_rows"] += malformed
+        for person_id, name, birth in rows:
+            if person_id in people:
+                stats["duplicate_ids"] += 1
+            people[person_id] = {"name": name, "birth": birth,
+                                 "movies": set()}
+            names.setdefault(name.lower(), set()).add(person_id)
+        stats["people"] = len(rows)
+
+        # Load movies
+        movies = {}
+        rows, malformed = movie_rows.result()
+        stats["malformed_rows"] += malformed
+        for movie_id, title, year in rows:
+            if movie_id in movies:
+                stats["duplicate_ids"] += 1
+            movies[movie_id] = {"title": title, "year": year,
+                                "stars": set()}
+        stats["movies"] = len(rows)
+        del rows
+
+        # Merge stars chunk by chunk, in file order
+        for chunk in star_chunks:
+            person_ids, movie_ids, malformed = chunk.result()
+            stats["malformed_rows"] += malformed
+            stats["stars"] += len(person_ids)
+            for person_id, movie_id in zip(person_ids, movie_ids):
+                person = people.get(person_id)
+                movie = movies.get(movie_id)
+                if person is None:
+                    stats["dangling_people"] += 1
+                elif movie is None:
+                    stats["dangling_movies"] += 1
+                else:
+                    person["movies"].add(movie_id)
+                    movie["stars"].add(person_id)
+
+    stats["seconds"] = time.perf_counter() - start
+    rows = stats["people"] + stats["movies"] + stats["stars"]
+    stats["rows_per_second"] = rows / stats["seconds"]
+    return people, movies, names, stats
+
+
+def report(stats):
+    """
+    Prints the counts and throughput of an ingest.
+    """
+    print(f"Loaded {stats['people']} people, {stats['movies']} movies "
+          f"and {stats['stars']} star rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:.0f} rows/sec).")
+    dropped = [f"{stats[key]} {key.replace('_', ' ')}"
+               for key in ["malformed_rows", "duplicate_ids",
+                           "dangling_people", "dangling_movies"]
+               if stats[key]]
+    if dropped:
+        print("Dropped:", ", ".join(dropped) + ".")
+
+
+def benchmark(sizes, processes):
+    """
+    Ingests synthetic datasets (see generate.py) of each size in `sizes`
+    star rows, one in 1000 of them dangling.
+    """
+    for stars in sizes:
+        directory = tempfile.mkdtemp(prefix="degrees-ingest-")
+        try:
+            generate(directory, stars, dangling=0.001)
+            *_, stats = ingest(directory, processes)
+            print(f"{stars} star rows:")
+            report(stats)
+        finally:
+            shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--benchmark", type=int, nargs="*", metavar="ROWS",
+                        help="ingest synthetic datasets with this many "
+                             "star rows (default: 1M, 10M and 50M)")
+    args = parser.parse_args()
+
+    if args.benchmark is not None:
+        benchmark(args.benchmark or [1_000_000, 10_000_000, 50_000_000],
+                  args.processes)
+    elif args.directory is not None:
+        *_, stats = ingest(args.directory, args.processes)
+        report(stats)
+    else:
+        sys.exit("Usage: python ingest.py directory | --benchmark [ROWS ...]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Name index for looking up people without prompting.
+
+NameIndex keeps the distinct normalized names in a sorted list for exact
+and prefix lookups with bisect, plus a trigram index over them for typo
+tolerant lookups verified with a bounded edit distance. Candidates are
+ranked by edit distance, then by number of movies, then by name.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from heapq import nsmallest
+
+Candidate = namedtuple("Candidate",
+                       ["person_id", "name", "birth", "movies", "distance"])
+
+POLICIES = ["unique", "popular", "fuzzy"]
+
+
+def normalize(name):
+    """
+    Returns the lowercase name with runs of whitespace collapsed.
+    """
+    return " ".join(name.lower().split())
+
+
+def trigrams(key):
+    """
+    Returns the set of trigrams of a padded normalized name.
+    """
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between a and b,
+    or limit + 1 if it is greater than limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class NameIndex():
+
+    def __init__(self, person_ids, names, births, movie_counts):
+        """
+        Builds the index from parallel sequences describing every person.
+        """
+        self.person_ids = person_ids
+        self.names = names
+        self.births = births
+        self.movie_counts = movie_counts
+
+        # Distinct keys, sorted, and the people sharing each key
+        groups = {}
+        for person, name in enumerate(names):
+            groups.setdefault(normalize(name), []).append(person)
+        self.keys = sorted(groups)
+        self.people = [array("I", groups[key]) for key in self.keys]
+        del groups
+
+        # Maps a trigram to the positions of the keys containing it,
+        # built on the first fuzzy lookup since it dominates build time
+        self.postings = None
+
+    def build_postings(self):
+        """
+        Builds the trigram index used by fuzzy lookups.
+        """
+        postings = {}
+        for position, key in enumerate(self.keys):
+            for trigram in trigrams(key):
+                posting = postings.get(trigram)
+                if posting is None:
+                    posting = postings[trigram] = array("I")
+                posting.append(position)
+        self.postings = postings
+
+    def candidates(self, positions, distance):
+        """
+        Yields the Candidates for everybody with a key at `positions`.
+        """
+        for position in positions:
+            for person in self.people[position]:
+                yield Candidate(self.person_ids[person], self.names[person],
+                                self.births[person],
+                                self.movie_counts[person], distance)
+
+    def rank(self, candidates, limit=None):
+        """
+        Returns the `limit` best ranked candidates, or all of them.
+        """
+        key = lambda c: (c.distance, -c.movies, c.name, c.person_id)
+        if limit is None:
+            return sorted(candidates, key=key)
+        return nsmallest(limit, candidates, key=key)
+
+    def exact(self, name):
+        """
+        Returns the ranked Candidates whose name matches exactly,
+        ignoring case and whitespace.
+        """
+        key = normalize(name)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.rank(self.candidates([i], 0))
+        return []
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` ranked Candidates whose name starts
+        with `prefix`, ranked among everybody whose name does.
+        """
+        key = normalize(prefix)
+        start = bisect_left(self.keys, key)
+        end = bisect_left(self.keys, key + "\U0010ffff", start)
+        return self.rank(self.candidates(range(start, end), 0), limit)
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Returns up to `limit` ranked Candidates within `max_distance`
+        edits of `name`.
+
+        Each edit changes at most three trigrams, so only keys sharing
+        enough trigrams with `name` (and at least one) are verified.
+        """
+        if self.postings is None:
+            self.build_postings()
+        key = normalize(name)
+        grams = trigrams(key)
+        shared = Counter()
+        for trigram in grams:
+            shared.update(self.postings.get(trigram, ()))
+        needed = max(1, len(grams) - 3 * max_distance)
+
+        matches = []
+        for position, count in shared.items():
+            if count < needed:
+                continue
+            distance = edit_distance(key, self.keys[position], max_distance)
+            if distance <= max_distance:
+                matches.extend(self.candidates([position], distance))
+        return self.rank(matches, limit)
+
+    def lookup(self, name, max_distance=2, limit=10):
+        """
+        Returns up to `limit` ranked Candidates for `name`: exact matches
+        if there are any, then prefix matches, then typo matches.
+        """
+        return (self.exact(name)[:limit] or self.prefix(name, limit)
+                or self.fuzzy(name, max_distance, limit))
+
+    def resolve(self, name, policy="unique"):
+        """
+        Returns a single person_id for `name` without prompting,
+        or None, according to `policy`:
+            - "unique": the only exact match, None if ambiguous
+            - "popular": the exact match with the most movies
+            - "fuzzy": the best ranked match of lookup()
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy}")
+        if policy == "fuzzy":
+            candidates = self.lookup(name, limit=1)
+        else:
+            candidates = self.exact(name)
+            if policy == "unique" and len(candidates) > 1:
+                return None
+        return candidates[0].person_id if candidates else None
+
+
+def build_name_index(people, graph=None):
+    """
+    Builds a NameIndex from the `people` dict of degrees.py,
+    or directly from its arrays when given a compact Graph.
+    """
+    if graph is not None:
+        offsets = graph.person_offsets
+        movie_counts = array("I", (offsets[i + 1] - offsets[i]
+                                   for i in range(len(graph.person_ids))))
+        return NameIndex(graph.person_ids, graph.names, graph.births,
+                         movie_counts)
+    person_ids = list(people)
+    return NameIndex(
+        person_ids,
+        [people[person_id]["name"] for person_id in person_ids],
+        [people[person_id]["birth"] for person_id in person_ids],
+        array("I", (len(people[person_id]["movies"])
+                    for person_id in person_ids))
+    )
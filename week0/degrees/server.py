@@ -0,0 +1,227 @@
+"""
+Long-running degrees query server.
+
+    $ python server.py directory [--port 8050 | --unix PATH] [--workers N]
+
+Loads the graph once and answers HTTP GET requests, each with a JSON body:
+    /path?source=ID&target=ID[&bidirectional=1]
+        shortest path between two person ids
+    /person?name=NAME
+        ranked candidates for a name (exact, prefix or typo matches)
+        with their id, name, birth year, movie count and edit distance
+    /stats
+        counters of the result cache and hub trees (see cache.py)
+
+Searches run in a pool of forked worker processes which share the loaded
+graph, so a slow search does not hold up other requests. Where fork is not
+available each worker loads the data itself. A request that fails with an
+unexpected error is answered with a 500 and the error. Every response
+includes its latency in milliseconds, and path responses also include the
+number of people explored (0 when answered from the cache).
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+from batch import init_worker
+from cache import QueryCache
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class Server():
+
+    def __init__(self, executor, cache=None):
+        self.executor = executor
+        self.cache = cache
+        # Hubs whose BFS trees are being built
+        self.pending = set()
+
+    async def handle(self, reader, writer):
+        """
+        Answers a single HTTP request and closes the connection.
+        """
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            start = time.perf_counter()
+            try:
+                method, target, _ = request.decode("latin-1").split(" ", 2)
+            except ValueError:
+                status, body = 400, {"error": "malformed request"}
+            else:
+                if method != "GET":
+                    status, body = 405, {"error": "only GET is supported"}
+                else:
+                    try:
+                        status, body = await self.route(target)
+                    except Exception as error:
+                        status, body = 500, {
+                            "error": f"{type(error).__name__}: {error}"
+                        }
+            body["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            await self.respond(writer, status, body)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, target):
+        """
+        Returns the status and JSON body for a request target.
+        """
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/path":
+            return await self.path(query)
+        elif url.path == "/person":
+            return self.person(query)
+        elif url.path == "/stats":
+            return 200, self.cache.stats() if self.cache is not None else {}
+        return 404, {"error": f"unknown endpoint {url.path}"}
+
+    async def path(self, query):
+        source = query.get("source")
+        target = query.get("target")
+        if source is None or target is None:
+            return 400, {"error": "source and target are required"}
+        for person_id in (source, target):
+            if person_id not in degrees.people:
+                return 404, {"error": f"unknown person {person_id}"}
+        bidirectional = query.get("bidirectional", "0") not in ("", "0")
+
+        found, path = False, None
+        if self.cache is not None:
+            found, path = self.cache.get(source, target)
+        num_explored = 0
+        if not found:
+            loop = asyncio.get_running_loop()
+            path, num_explored = await loop.run_in_executor(
+                self.executor, degrees.search, source, target, bidirectional
+            )
+            if self.cache is not None:
+                self.cache.put(source, target, path)
+                self.build_trees()
+        return 200, {
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path,
+            "explored": num_explored,
+            "cached": found
+        }
+
+    def build_trees(self):
+        """
+        Starts building BFS trees for new hubs in the background.
+        """
+        loop = asyncio.get_running_loop()
+        for hub in self.cache.hub_candidates():
+            if hub in self.pending:
+                continue
+            self.pending.add(hub)
+            future = loop.run_in_executor(self.executor,
+                                          degrees.bfs_parents, hub)
+            future.add_done_callback(
+                lambda future, hub=hub: self.add_tree(hub, future)
+            )
+
+    def add_tree(self, hub, future):
+        self.pending.discard(hub)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.add_tree(hub, future.result()[0])
+
+    def person(self, query):
+        name = query.get("name")
+        if name is None:
+            return 400, {"error": "name is required"}
+        candidates = [
+            {
+                "id": candidate.person_id,
+                "name": candidate.name,
+                "birth": candidate.birth,
+                "movies": candidate.movies,
+                "distance": candidate.distance
+            }
+            for candidate in degrees.get_name_index().lookup(name)
+        ]
+        if not candidates:
+            return 404, {"error": f"unknown name {name}"}
+        return 200, {"name": name, "candidates": candidates}
+
+    async def respond(self, writer, status, body):
+        content = json.dumps(body).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + content
+        )
+        await writer.drain()
+
+
+async def serve(args):
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "fork" if "fork" in methods else None
+    )
+    with concurrent.futures.ProcessPoolExecutor(
+        args.workers, mp_context=context, initializer=init_worker,
+        initargs=(args.directory, args.compact, args.snapshot)
+    ) as executor:
+        cache = None
+        if args.cache_size > 0:
+            cache = QueryCache(args.cache_size, args.hubs)
+        server = Server(executor, cache)
+        if args.unix is not None:
+            listener = await asyncio.start_unix_server(server.handle,
+                                                       args.unix)
+            print(f"Serving on {args.unix}")
+        else:
+            listener = await asyncio.start_server(server.handle, args.host,
+                                                  args.port)
+            print(f"Serving on http://{args.host}:{args.port}")
+        async with listener:
+            await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--unix", help="listen on a Unix socket instead")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="search processes (default: one per CPU)")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="cached results, 0 disables the cache")
+    parser.add_argument("--hubs", type=int, default=8,
+                        help="BFS trees kept for the most queried people")
+    parser.add_argument("--compact", action="store_true",
+                        help="use the integer-indexed graph store")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="memory-map the graph from a binary snapshot")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=args.compact,
+                      snapshot=args.snapshot)
+    degrees.get_name_index().build_postings()
+    print("Data loaded.")
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
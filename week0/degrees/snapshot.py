@@ -0,0 +1,200 @@
+"""
+Persistent binary snapshot of a degrees dataset.
+
+The snapshot stores a compact Graph as raw arrays plus string tables in a
+single file next to the CSVs, so it can be memory-mapped: loading is
+near-instant and processes reading the same snapshot share its pages.
+
+Layout (native byte order, every section 8-byte aligned):
+    header    MAGIC, VERSION, byte order mark, section count
+    stamp     (size, mtime_ns) of people.csv, movies.csv and stars.csv
+    sections  (offset, length) of each section in SECTIONS order
+    data      the sections themselves
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph, load_graph
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 1
+BYTE_ORDER = 0x01020304
+FILENAME = "degrees.snapshot"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# String tables are stored as a "Q" offsets array followed by a UTF-8 blob
+STRINGS = ["person_ids", "names", "births", "movie_ids", "titles", "years"]
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars",
+          "name_order"]
+SECTIONS = ([part for name in STRINGS
+             for part in (f"{name}.offsets", f"{name}.blob")] + ARRAYS)
+
+HEADER = struct.Struct(f"={len(MAGIC)}sIII")
+STAMP = struct.Struct("=" + "qq" * len(SOURCES))
+SECTION = struct.Struct("=QQ")
+
+
+class StringTable():
+    """
+    Read-only sequence of strings backed by an offsets array and a blob.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_stamp(directory):
+    """
+    Returns the (size, mtime_ns) pairs of the CSV files in `directory`.
+    """
+    stamp = []
+    for source in SOURCES:
+        stat = os.stat(os.path.join(directory, source))
+        stamp.extend([stat.st_size, stat.st_mtime_ns])
+    return stamp
+
+
+def encode_strings(strings):
+    """
+    Returns the offsets array and UTF-8 blob for a sequence of strings.
+    """
+    offsets = array("Q", [0])
+    chunks = []
+    for string in strings:
+        chunk = string.encode("utf-8")
+        chunks.append(chunk)
+        offsets.append(offsets[-1] + len(chunk))
+    return offsets.tobytes(), b"".join(chunks)
+
+
+def build_snapshot(directory, graph=None):
+    """
+    Writes the snapshot for the CSVs in `directory` and returns its path.
+    """
+    stamp = source_stamp(directory)
+    if graph is None:
+        graph = load_graph(directory)
+
+    data = []
+    for name in STRINGS:
+        data.extend(encode_strings(getattr(graph, name)))
+    for name in ARRAYS:
+        data.append(array("I", getattr(graph, name)).tobytes())
+
+    # Lay the sections out after the header, stamp and section table
+    position = HEADER.size + STAMP.size + SECTION.size * len(SECTIONS)
+    sections = []
+    for section in data:
+        position += -position % 8
+        sections.append((position, len(section)))
+        position += len(section)
+
+    path = snapshot_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDER, len(SECTIONS)))
+        f.write(STAMP.pack(*stamp))
+        for offset, length in sections:
+            f.write(SECTION.pack(offset, length))
+        for (offset, _), section in zip(sections, data):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(section)
+    os.replace(temporary, path)
+    return path
+
+
+def load_snapshot(directory):
+    """
+    Memory-maps the snapshot in `directory` and returns it as a Graph.
+
+    Returns None if there is no snapshot, it was written by another
+    version, it is truncated, or the CSVs changed size or mtime since
+    it was built.
+    """
+    path = snapshot_path(directory)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+    view = memoryview(buffer)
+
+    if len(view) < HEADER.size + STAMP.size + len(SECTIONS) * SECTION.size:
+        return None
+    magic, version, byte_order, count = HEADER.unpack_from(view)
+    if (magic != MAGIC or version != VERSION or byte_order != BYTE_ORDER
+            or count != len(SECTIONS)):
+        return None
+    try:
+        if list(STAMP.unpack_from(view, HEADER.size)) != \
+                source_stamp(directory):
+            return None
+    except FileNotFoundError:
+        return None
+
+    sections = {}
+    position = HEADER.size + STAMP.size
+    for name in SECTIONS:
+        offset, length = SECTION.unpack_from(view, position)
+        if offset + length > len(view):
+            return None
+        sections[name] = view[offset:offset + length]
+        position += SECTION.size
+
+    fields = {}
+    for name in STRINGS:
+        fields[name] = StringTable(sections[f"{name}.offsets"].cast("Q"),
+                                   sections[f"{name}.blob"])
+    for name in ARRAYS:
+        fields[name] = sections[name].cast("I")
+    return Graph(**fields)
+
+
+def open_snapshot(directory):
+    """
+    Returns the snapshot Graph for `directory`, rebuilding it first
+    if it is missing or stale.
+    """
+    graph = load_snapshot(directory)
+    if graph is None:
+        build_snapshot(directory)
+        graph = load_snapshot(directory)
+    return graph
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python snapshot.py directory")
+    path = build_snapshot(sys.argv[1])
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
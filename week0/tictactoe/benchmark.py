@@ -0,0 +1,120 @@
+"""
+Benchmarks for the Tic Tac Toe engines
+
+    $ python benchmark.py nodes|startup|parallel
+
+nodes: positions explored and time taken by tictactoe.minimax with and
+without alpha-beta pruning, from the empty board and every first move.
+
+startup: time to import tictactoe in a fresh interpreter, with and
+without warmup, compared to the import-time search it used to run.
+
+parallel: time of a fixed-depth mnk search on a 5x5 board with 4 in a
+row, serially and split across 1, 2, 4, ... worker processes up to the
+number of CPUs, checking that every run picks the same move.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import mnk
+import tictactoe as ttt
+
+
+def nodes():
+    boards = [("empty board", ttt.initial_state())]
+    for action in ttt.actions(ttt.initial_state()):
+        boards.append((f"X on {action}",
+                       ttt.result(ttt.initial_state(), action)))
+
+    print(f"{'position':<16}{'full':>10}{'pruned':>10}{'ratio':>8}"
+          f"{'full s':>9}{'pruned s':>10}")
+    totals = [0, 0]
+    for name, board in boards:
+        counts = []
+        seconds = []
+        moves = []
+        for prune in (False, True):
+            start = time.perf_counter()
+            moves.append(ttt.minimax(board, prune, use_book=False))
+            seconds.append(time.perf_counter() - start)
+            counts.append(ttt.nodes_explored)
+        if moves[0] != moves[1]:
+            sys.exit(f"Searches disagree on {name}: {moves}")
+        totals[0] += counts[0]
+        totals[1] += counts[1]
+        print(f"{name:<16}{counts[0]:>10}{counts[1]:>10}"
+              f"{counts[0] / counts[1]:>7.0f}x"
+              f"{seconds[0]:>9.3f}{seconds[1]:>10.3f}")
+    print(f"{'total':<16}{totals[0]:>10}{totals[1]:>10}"
+          f"{totals[0] / totals[1]:>7.0f}x")
+
+
+def startup(runs=5):
+    steps = [
+        ("import", ""),
+        ("import + warmup", "ttt.warmup()"),
+        ("import + background warmup", "ttt.warmup(background=True)"),
+        ("import + first move", "ttt.minimax(ttt.initial_state())"),
+        ("old import (full search)",
+         "ttt.minimax(ttt.initial_state(), prune=False, use_book=False)"),
+    ]
+    directory = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'startup':<30}{'median ms':>10}")
+    for name, step in steps:
+        code = ("import time\n"
+                "start = time.perf_counter()\n"
+                "import tictactoe as ttt\n"
+                f"{step}\n"
+                "print(time.perf_counter() - start)\n")
+        seconds = sorted(
+            float(subprocess.run([sys.executable, "-c", code], cwd=directory,
+                                 capture_output=True, text=True,
+                                 check=True).stdout)
+            for _ in range(runs)
+        )
+        print(f"{name:<30}{seconds[runs // 2] * 1000:>10.2f}")
+
+
+def parallel(depth=5):
+    game = mnk.Game(5, 5, 4)
+    board = game.initial_state()
+    for action in [(2, 2), (1, 1), (2, 1)]:
+        board = game.result(board, action)
+
+    start = time.perf_counter()
+    move = game.best_move(board, max_depth=depth)
+    serial = time.perf_counter() - start
+    print(f"5x5, k=4, depth {depth}: serial {serial:.3f}s, "
+          f"{game.stats['nodes']} nodes, move {move}")
+
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    print(f"{'processes':<12}{'seconds':>9}{'nodes':>10}{'speedup':>9}")
+    for processes in counts:
+        with mnk.create_pool(processes) as pool:
+            start = time.perf_counter()
+            parallel_move = mnk.parallel_best_move(game, board, pool,
+                                                   max_depth=depth)
+            seconds = time.perf_counter() - start
+        if parallel_move != move:
+            sys.exit(f"{processes} processes picked {parallel_move}, "
+                     f"serial picked {move}")
+        print(f"{processes:<12}{seconds:>9.3f}{game.stats['nodes']:>10}"
+              f"{serial / seconds:>8.2f}x")
+
+
+BENCHMARKS = {"nodes": nodes, "startup": startup, "parallel": parallel}
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py {'|'.join(BENCHMARKS)}")
+    BENCHMARKS[sys.argv[1]]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Bitboard Tic Tac Toe engine
+
+The board is encoded as two 9-bit masks, one per player, where bit
+3 * i + j is set if that player has a mark on (i, j). Wins are checked
+against precomputed line masks and position values are memoized in a
+transposition table, optionally keyed by the symmetry-canonical position.
+"""
+
+from tictactoe import X, O
+
+FULL = 0b111111111
+
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# The 8 symmetries of the board as maps from old to new cell index
+SYMMETRIES = []
+for _turns in range(4):
+    for _flip in (False, True):
+        _cells = []
+        for _cell in range(9):
+            _i, _j = divmod(_cell, 3)
+            for _ in range(_turns):
+                _i, _j = _j, 2 - _i
+            if _flip:
+                _j = 2 - _j
+            _cells.append(3 * _i + _j)
+        SYMMETRIES.append(_cells)
+
+# For every symmetry, the image of each of the 512 masks
+SYMMETRY_TABLES = [
+    [sum(1 << cells[cell] for cell in range(9) if mask >> cell & 1)
+     for mask in range(1 << 9)]
+    for cells in SYMMETRIES
+]
+
+# Maps (x, o) to the value of the position for X: 1, 0 or -1
+table = {}
+
+# Whether positions are stored under their symmetry-canonical key
+canonical = True
+
+
+def encode(board):
+    """
+    Returns the (x, o) masks for a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, field in enumerate(row):
+            if field == X:
+                x |= 1 << (3 * i + j)
+            elif field == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def wins(mask):
+    """
+    Returns True if a player with the given mask has three in a row.
+    """
+    for line in LINES:
+        if mask & line == line:
+            return True
+    return False
+
+
+def key(x, o):
+    """
+    Returns the transposition table key for a position.
+    """
+    if not canonical:
+        return (x, o)
+    return min((symmetry[x], symmetry[o]) for symmetry in SYMMETRY_TABLES)
+
+
+def moves(x, o):
+    """
+    Yields the free cells in the same order as tictactoe.actions.
+    """
+    free = ~(x | o) & FULL
+    for cell in range(9):
+        if free >> cell & 1:
+            yield cell
+
+
+def value(x, o):
+    """
+    Returns the minimax value of a position for X.
+    """
+    if wins(x):
+        return 1
+    if wins(o):
+        return -1
+    if x | o == FULL:
+        return 0
+
+    position = key(x, o)
+    if position in table:
+        return table[position]
+
+    x_turn = bin(x).count("1") <= bin(o).count("1")
+    if x_turn:
+        best = max(value(x | 1 << cell, o) for cell in moves(x, o))
+    else:
+        best = min(value(x, o | 1 << cell) for cell in moves(x, o))
+    table[position] = best
+    return best
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Among equally good actions the first one in tictactoe.actions order
+    is returned, which is the move tictactoe.minimax picks. Like it,
+    returns None when every action loses.
+    """
+    x, o = encode(board)
+    if wins(x) or wins(o) or x | o == FULL:
+        return None
+
+    x_turn = bin(x).count("1") <= bin(o).count("1")
+    best_value = None
+    best_move = None
+    for cell in moves(x, o):
+        if x_turn:
+            score = value(x | 1 << cell, o)
+        else:
+            score = -value(x, o | 1 << cell)
+        if best_value is None or score > best_value:
+            best_value = score
+            best_move = divmod(cell, 3)
+    if best_value == -1:
+        return None
+    return best_move
@@ -0,0 +1,52 @@
+"""
+Opening book generator for Tic Tac Toe
+
+    $ python book.py
+
+Enumerates every position reachable from the empty board, solves each
+non-terminal one with tictactoe.minimax and writes the chosen moves to
+book.bin: the magic bytes followed by one byte per board in base-3 index
+order (see tictactoe.book_index), holding the cell index 3 * i + j of the
+move, BOOK_NO_MOVE where minimax returns None, or BOOK_MISSING for
+terminal and unreachable boards.
+"""
+
+import tictactoe as ttt
+
+
+def reachable(board, seen):
+    """
+    Adds the book index of every non-terminal position reachable from
+    board to seen, mapping it to the position.
+    """
+    index = ttt.book_index(board)
+    if index in seen or ttt.terminal(board):
+        return
+    seen[index] = board
+    for action in ttt.actions(board):
+        reachable(ttt.result(board, action), seen)
+
+
+def generate():
+    """
+    Returns the book entries for all 3 ** 9 boards.
+    """
+    positions = {}
+    reachable(ttt.initial_state(), positions)
+    entries = bytearray([ttt.BOOK_MISSING]) * 3 ** 9
+    for index, board in positions.items():
+        move = ttt.minimax(board, use_book=False)
+        entries[index] = (ttt.BOOK_NO_MOVE if move is None
+                          else 3 * move[0] + move[1])
+    return bytes(entries), len(positions)
+
+
+def main():
+    entries, count = generate()
+    with open(ttt.BOOK_PATH, "wb") as f:
+        f.write(ttt.BOOK_MAGIC + entries)
+    print(f"Wrote {count} positions to {ttt.BOOK_PATH}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+Generalized m,n,k game (Tic Tac Toe, 4x4, Gomoku style k-in-a-row)
+
+A Game has `rows` x `cols` cells and is won by the first player to get
+`k` marks in a row, column or diagonal. Boards are lists of lists like in
+tictactoe.py. Wins are detected from the last move only, and best_move
+runs an iterative-deepening alpha-beta search with a heuristic evaluation
+of unfinished positions and an optional time budget per move. A search
+deep enough to reach every terminal position (always on 3x3 when no
+budget is given) is exact.
+"""
+
+import math
+import multiprocessing
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Value of a win, above any heuristic evaluation
+WIN = 10 ** 9
+
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+class Timeout(Exception):
+    pass
+
+
+class Game():
+
+    def __init__(self, rows=3, cols=3, k=3):
+        """
+        Initialize a game on a `rows` x `cols` board with win length `k`.
+        Cells are numbered row by row, cell r * cols + c being (r, c).
+        """
+        if k > max(rows, cols):
+            raise ValueError("k longer than the board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+
+        # Every line of k cells a player could complete
+        self.windows = []
+        for r in range(rows):
+            for c in range(cols):
+                for dr, dc in DIRECTIONS:
+                    end_r = r + (k - 1) * dr
+                    end_c = c + (k - 1) * dc
+                    if 0 <= end_r < rows and 0 <= end_c < cols:
+                        self.windows.append(tuple(
+                            (r + i * dr) * cols + c + i * dc for i in range(k)
+                        ))
+
+        # Heuristic weight of a window holding n marks of one player only
+        self.weights = [0] + [10 ** n for n in range(1, k)]
+
+        # Neighbours of each cell, used to restrict moves on large boards
+        self.neighbours = []
+        for r in range(rows):
+            for c in range(cols):
+                self.neighbours.append([
+                    nr * cols + nc
+                    for nr in range(max(0, r - 2), min(rows, r + 3))
+                    for nc in range(max(0, c - 2), min(cols, c + 3))
+                    if (nr, nc) != (r, c)
+                ])
+
+        self.nodes = 0
+        self.deadline = None
+        # Statistics of the last call to best_move
+        self.stats = {}
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.cols for _ in range(self.rows)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x_amount = sum(row.count(X) for row in board)
+        o_amount = sum(row.count(O) for row in board)
+        return O if x_amount > o_amount else X
+
+    def actions(self, board):
+        """
+        Returns the list of all possible actions (i, j) on the board.
+        """
+        return [(i, j) for i, row in enumerate(board)
+                for j, field in enumerate(row) if field is EMPTY]
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j).
+        """
+        i, j = action
+        if board[i][j] is not EMPTY:
+            raise ValueError("cell already taken")
+        copy_board = [row.copy() for row in board]
+        copy_board[i][j] = self.player(board)
+        return copy_board
+
+    def wins_at(self, cells, index):
+        """
+        Returns True if the mark at `index` of the flat board `cells`
+        is part of k in a row, checking only lines through that cell.
+        """
+        mark = cells[index]
+        if mark is EMPTY:
+            return False
+        r, c = divmod(index, self.cols)
+        for dr, dc in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                nr, nc = r + sign * dr, c + sign * dc
+                while (0 <= nr < self.rows and 0 <= nc < self.cols
+                       and cells[nr * self.cols + nc] == mark):
+                    count += 1
+                    nr += sign * dr
+                    nc += sign * dc
+            if count >= self.k:
+                return True
+        return False
+
+    def winner(self, board, last=None):
+        """
+        Returns the winner of the game, if there is one.
+        With `last`, the (i, j) of the last move, only lines
+        through that move are checked.
+        """
+        cells = [field for row in board for field in row]
+        if last is not None:
+            index = last[0] * self.cols + last[1]
+            return cells[index] if self.wins_at(cells, index) else None
+        for window in self.windows:
+            mark = cells[window[0]]
+            if mark is not EMPTY and all(cells[i] == mark for i in window):
+                return mark
+        return None
+
+    def terminal(self, board, last=None):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board, last) is not None
+                or all(field is not EMPTY for row in board for field in row))
+
+    def utility(self, board, last=None):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board, last)
+        return 1 if winner == X else -1 if winner == O else 0
+
+    def evaluate(self, cells, mark):
+        """
+        Returns the heuristic value of an unfinished position for the
+        player `mark`: windows only one player has marks in count for
+        that player, weighted by how many marks they hold.
+        """
+        score = 0
+        for window in self.windows:
+            mine = theirs = 0
+            for index in window:
+                field = cells[index]
+                if field is EMPTY:
+                    continue
+                if field == mark:
+                    mine += 1
+                else:
+                    theirs += 1
+            if not theirs:
+                score += self.weights[mine]
+            elif not mine:
+                score -= self.weights[theirs]
+        return score
+
+    def candidates(self, cells):
+        """
+        Returns the cells worth playing, most promising first. On boards
+        larger than 5x5 only cells near existing marks are considered.
+        """
+        empty = [i for i in range(self.size) if cells[i] is EMPTY]
+        if self.size > 25:
+            near = [i for i in empty
+                    if any(cells[n] is not EMPTY for n in self.neighbours[i])]
+            if near:
+                empty = near
+            else:
+                return [(self.rows // 2) * self.cols + self.cols // 2]
+
+        def crowding(i):
+            return -sum(cells[n] is not EMPTY for n in self.neighbours[i])
+        return sorted(empty, key=lambda i: (crowding(i), i))
+
+    def negamax(self, cells, depth, alpha, beta, mark, last, empties, ply):
+        """
+        Returns the value of the position for `mark`, who is to move,
+        searching `depth` plies ahead with alpha-beta pruning.
+        """
+        self.nodes += 1
+        # Checked at every node: on large boards a single node, with its
+        # full-board evaluation, takes long enough to matter
+        if (self.deadline is not None
+                and time.perf_counter() > self.deadline):
+            raise Timeout()
+        if last is not None and self.wins_at(cells, last):
+            return -(WIN - ply)
+        if empties == 0:
+            return 0
+        if depth == 0:
+            return self.evaluate(cells, mark)
+
+        other = O if mark == X else X
+        best = -math.inf
+        for move in self.candidates(cells):
+            cells[move] = mark
+            value = -self.negamax(cells, depth - 1, -beta, -alpha, other,
+                                  move, empties - 1, ply + 1)
+            cells[move] = EMPTY
+            if value > best:
+                best = value
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+        return best
+
+    def search_root(self, cells, depth, mark, empties, order):
+        """
+        Searches every root move in `order` to `depth` plies and returns
+        (value, move) of the best one. Ties go to the lowest cell index,
+        whatever the order, so the choice only depends on the position.
+        """
+        other = O if mark == X else X
+        best_value = -math.inf
+        best_move = None
+        for move in order:
+            cells[move] = mark
+            # Values are integers, so this window still tells equal
+            # values apart from worse ones
+            value = -self.negamax(cells, depth - 1, -math.inf,
+                                  -(best_value - 1), other, move,
+                                  empties - 1, 1)
+            cells[move] = EMPTY
+            if value > best_value or (value == best_value
+                                      and move < best_move):
+                best_value = value
+                best_move = move
+        return best_value, best_move
+
+    def best_move(self, board, time_budget=None, max_depth=None):
+        """
+        Returns the best action (i, j) for the current player, or None
+        if the game is over.
+
+        Searches one ply deeper at a time until `max_depth` (by default
+        the rest of the game) or until `time_budget` seconds have passed,
+        keeping the result of the deepest completed search.
+        """
+        if self.terminal(board):
+            return None
+        start = time.perf_counter()
+        cells = [field for row in board for field in row]
+        mark = self.player(board)
+        empties = cells.count(EMPTY)
+        max_depth = empties if max_depth is None else min(max_depth, empties)
+        self.nodes = 0
+        self.deadline = None if time_budget is None else start + time_budget
+
+        order = self.candidates(cells)
+        best_value, best_move, depth = None, order[0], 0
+        try:
+            for depth in range(1, max_depth + 1):
+                value, move = self.search_root(cells, depth, mark, empties,
+                                               order)
+                best_value, best_move = value, move
+                # Try the best move first at the next depth
+                order = [move] + [m for m in order if m != move]
+                if abs(value) > WIN // 2:
+                    break
+        except Timeout:
+            depth -= 1
+        finally:
+            self.deadline = None
+
+        self.stats = {
+            "depth": depth,
+            "nodes": self.nodes,
+            "value": best_value,
+            "exact": depth == empties or (best_value is not None
+                                         and abs(best_value) > WIN // 2),
+            "seconds": time.perf_counter() - start
+        }
+        return divmod(best_move, self.cols)
+
+
+# Game of each worker process, keyed by (rows, cols, k)
+worker_games = {}
+
+
+def search_move(task):
+    """
+    Returns (move, value, nodes) for one root move searched to `depth`.
+    The value is exact if it is at least `bound`, otherwise it is only
+    known to be below it. Runs in a worker process.
+    """
+    rows, cols, k, cells, depth, mark, empties, move, bound, deadline = task
+    game = worker_games.get((rows, cols, k))
+    if game is None:
+        game = worker_games[(rows, cols, k)] = Game(rows, cols, k)
+    game.nodes = 0
+    # `deadline` is wall-clock time, which all processes share
+    game.deadline = None
+    if deadline is not None:
+        game.deadline = time.perf_counter() + deadline - time.time()
+    other = O if mark == X else X
+    cells = cells.copy()
+    cells[move] = mark
+    try:
+        value = -game.negamax(cells, depth - 1, -math.inf, -(bound - 1),
+                              other, move, empties - 1, 1)
+    except Timeout:
+        value = None
+    finally:
+        game.deadline = None
+    return move, value, game.nodes
+
+
+def parallel_best_move(game, board, pool, time_budget=None, max_depth=None):
+    """
+    Like game.best_move, but every iteration searches the root moves in
+    parallel on `pool`, a multiprocessing pool, and merges their values.
+
+    The previous best move is searched first to get a bound, then all
+    others in parallel against it. As in search_root, every value at
+    least as good as the bound is exact and ties go to the lowest cell
+    index, so at the same depth both pick the same move.
+    """
+    if game.terminal(board):
+        return None
+    start = time.perf_counter()
+    cells = [field for row in board for field in row]
+    mark = game.player(board)
+    empties = cells.count(EMPTY)
+    max_depth = empties if max_depth is None else min(max_depth, empties)
+
+    order = game.candidates(cells)
+    best_value, best_move, completed, nodes = None, order[0], 0, 0
+    deadline = None if time_budget is None else time.time() + time_budget
+    for depth in range(1, max_depth + 1):
+        if deadline is not None and time.time() >= deadline:
+            break
+        task = (game.rows, game.cols, game.k, cells, depth, mark, empties)
+        first = search_move(task + (order[0], -math.inf, deadline))
+        results = [first]
+        if first[1] is not None:
+            results += pool.map(
+                search_move,
+                [task + (move, first[1], deadline) for move in order[1:]],
+                chunksize=1
+            )
+        nodes += sum(result[2] for result in results)
+        if any(value is None for _, value, _ in results):
+            break
+        best_value, best_move = max(
+            ((value, -move) for move, value, _ in results)
+        )
+        best_move = -best_move
+        order = [best_move] + [move for move in order if move != best_move]
+        completed = depth
+        if abs(best_value) > WIN // 2:
+            break
+
+    game.stats = {
+        "depth": completed,
+        "nodes": nodes,
+        "value": best_value,
+        "exact": completed == empties or (best_value is not None
+                                         and abs(best_value) > WIN // 2),
+        "seconds": time.perf_counter() - start
+    }
+    return divmod(best_move, game.cols)
+
+
+def create_pool(processes=None):
+    """
+    Returns a process pool for parallel_best_move.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "fork" if "fork" in methods else None
+    )
+    return context.Pool(processes)
+
+
+def minimax(board, k=3, time_budget=None, max_depth=None):
+    """
+    Returns the best action for the current player on a board of any
+    size with win length `k`.
+    """
+    game = Game(len(board), len(board[0]), k)
+    return game.best_move(board, time_budget, max_depth)
@@ -1,9 +1,19 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
+# Frames drawn per second, and so the longest a frame may take,
+# in seconds, before it counts as a stall
+FPS = 60
+FRAME_BUDGET = 1 / FPS
+# Shortest time the computer appears to think, in seconds
+THINK_TIME = 0.5
+# Time after a button click during which clicks are ignored, in seconds
+CLICK_DELAY = 0.2
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -17,17 +27,61 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+clock = pygame.time.Clock()
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# AI moves are computed on a worker thread while the loop keeps drawing
+executor = ThreadPoolExecutor(max_workers=1)
+ttt.warmup(background=True)
+ai_move = None
+ai_started = 0
+ignore_clicks_until = 0
+
+# Frame time instrumentation, printed on exit with --frame-stats
+frame_stats = "--frame-stats" in sys.argv[1:]
+frames = 0
+slow_frames = 0
+slowest_frame = 0
+
+
+def reset_ai():
+    """
+    Cancels the pending AI move; a move already being computed
+    finishes on the worker but its result is ignored.
+    """
+    global ai_move
+    if ai_move is not None:
+        ai_move.cancel()
+        ai_move = None
+
+
+def reset_game():
+    """
+    Goes back to choosing a player, also in the middle of a game.
+    """
+    global user, board
+    user = None
+    board = ttt.initial_state()
+    reset_ai()
+
 
 while True:
+    frame_start = time.perf_counter()
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            executor.shutdown(wait=False, cancel_futures=True)
+            if frame_stats:
+                print(f"Frames: {frames}, slowest: {slowest_frame * 1000:.1f}ms, "
+                      f"over {FRAME_BUDGET * 1000:.1f}ms budget: {slow_frames}")
             sys.exit()
 
     screen.fill(black)
+    now = time.perf_counter()
+    click, _, _ = pygame.mouse.get_pressed()
+    click = click == 1 and now >= ignore_clicks_until
 
     # Let user choose a player.
     if user is None:
@@ -54,14 +108,13 @@ while True:
         screen.blit(playO, playORect)
 
         # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
+        if click:
             mouse = pygame.mouse.get_pos()
             if playXButton.collidepoint(mouse):
-                time.sleep(0.2)
+                ignore_clicks_until = now + CLICK_DELAY
                 user = ttt.X
             elif playOButton.collidepoint(mouse):
-                time.sleep(0.2)
+                ignore_clicks_until = now + CLICK_DELAY
                 user = ttt.O
 
     else:
@@ -102,45 +155,51 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (1 + int((now - ai_started) * 3) % 3)
+            title = f"Computer thinking{dots:<3}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, without waiting for it
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = executor.submit(ttt.minimax, board)
+                ai_started = now
+            elif ai_move.done() and now - ai_started >= THINK_TIME:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1 and user == player and not game_over:
+        if click and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
             for i in range(3):
                 for j in range(3):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+        # Play again after the game, or restart it while it is played,
+        # even while the computer is thinking
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        again = mediumFont.render("Play Again" if game_over else "Restart",
+                                  True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        if click:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                ignore_clicks_until = now + CLICK_DELAY
+                reset_game()
 
     pygame.display.flip()
+
+    frames += 1
+    frame_time = time.perf_counter() - frame_start
+    slowest_frame = max(slowest_frame, frame_time)
+    if frame_time > FRAME_BUDGET:
+        slow_frames += 1
+
+    clock.tick(FPS)
@@ -0,0 +1,216 @@
+"""
+Headless self-play harness for the Tic Tac Toe engines
+
+    $ python selfplay.py [--engines minimax book bitboard mnk random]
+                         [--games N] [--random-plies N] [--seed N]
+
+Plays `--games` games for every ordered pair of engines, the first one
+playing X. Each game starts with `--random-plies` random moves so that
+deterministic engines do not replay the same game, then the engines
+take turns. For every engine and match it reports moves per second and
+positions searched per move, and for every match the outcomes.
+
+Every move of a perfect engine is checked against the minimax value of
+the position, computed by a plain memoized search independent of the
+engines: it has to keep the value, and it may only give up (return
+None) in a lost position. Games between two perfect engines have to end
+with the value of their opening. The harness exits with status 1 if any
+check fails, so it can gate changes to the engines.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import bitboard
+import mnk
+import tictactoe as ttt
+
+# Maps book indexes of boards to their minimax value for X
+values = {}
+
+
+def minimax_engine(rng):
+    """
+    The list-based search of tictactoe.py, without the opening book.
+    """
+    def move(board):
+        return ttt.minimax(board, use_book=False), ttt.nodes_explored
+    return move
+
+
+def book_engine(rng):
+    """
+    tictactoe.minimax answering from the opening book.
+    """
+    ttt.warmup()
+
+    def move(board):
+        return ttt.minimax(board), ttt.nodes_explored
+    return move
+
+
+def bitboard_engine(rng):
+    """
+    The bitboard search, counting positions added to its
+    transposition table. The table starts empty for every match.
+    """
+    bitboard.table.clear()
+
+    def move(board):
+        before = len(bitboard.table)
+        action = bitboard.minimax(board)
+        return action, len(bitboard.table) - before
+    return move
+
+
+def mnk_engine(rng):
+    """
+    The generalized m,n,k search on a 3x3 board, which is exact.
+    """
+    game = mnk.Game(3, 3, 3)
+
+    def move(board):
+        action = game.best_move(board)
+        return action, game.stats.get("nodes", 0)
+    return move
+
+
+def random_engine(rng):
+    """
+    Plays a random legal move.
+    """
+    def move(board):
+        return rng.choice(ttt.actions(board)), 0
+    return move
+
+
+ENGINES = {
+    "minimax": minimax_engine,
+    "book": book_engine,
+    "bitboard": bitboard_engine,
+    "mnk": mnk_engine,
+    "random": random_engine
+}
+
+# Engines that have to play perfectly
+PERFECT = {"minimax", "book", "bitboard", "mnk"}
+
+
+def position_value(board):
+    """
+    Returns the minimax value of a board for X: 1, 0 or -1.
+    """
+    index = ttt.book_index(board)
+    if index not in values:
+        if ttt.terminal(board):
+            values[index] = ttt.utility(board)
+        else:
+            children = [position_value(ttt.result(board, action))
+                        for action in ttt.actions(board)]
+            values[index] = (max(children) if ttt.player(board) == ttt.X
+                             else min(children))
+    return values[index]
+
+
+def play(board, engines, names, totals, errors):
+    """
+    Plays a game from `board` between `engines`, a dict mapping X and O
+    to move functions, and returns its utility. Adds moves, seconds and
+    nodes to `totals` and failed checks to `errors`.
+    """
+    while not ttt.terminal(board):
+        mark = ttt.player(board)
+        name = names[mark]
+        start = time.perf_counter()
+        action, nodes = engines[mark](board)
+        seconds = time.perf_counter() - start
+        totals[mark][0] += 1
+        totals[mark][1] += seconds
+        totals[mark][2] += nodes
+
+        expected = position_value(board)
+        lost = -1 if mark == ttt.X else 1
+        if action is None:
+            if name in PERFECT and expected != lost:
+                errors.append(f"{name} gave up as {mark} on {board}")
+            return lost
+        if action not in ttt.actions(board):
+            errors.append(f"{name} played illegal {action} on {board}")
+            return lost
+        board = ttt.result(board, action)
+        if name in PERFECT and position_value(board) != expected:
+            errors.append(f"{name} played {action} as {mark} on a board "
+                          f"worth {expected}, leaving {position_value(board)}")
+    return ttt.utility(board)
+
+
+def match(first, second, games, random_plies, seed, errors):
+    """
+    Plays `games` games with `first` as X and `second` as O.
+    Returns the outcomes and the per-engine totals.
+    """
+    rng = random.Random(seed)
+    names = {ttt.X: first, ttt.O: second}
+    engines = {ttt.X: ENGINES[first](random.Random(seed + 1)),
+               ttt.O: ENGINES[second](random.Random(seed + 2))}
+    # [moves, seconds, nodes] for each side
+    totals = {ttt.X: [0, 0.0, 0], ttt.O: [0, 0.0, 0]}
+    outcomes = {1: 0, 0: 0, -1: 0}
+
+    for _ in range(games):
+        board = ttt.initial_state()
+        for _ in range(random_plies):
+            if ttt.terminal(board):
+                break
+            board = ttt.result(board, rng.choice(ttt.actions(board)))
+        expected = position_value(board)
+        outcome = play(board, engines, names, totals, errors)
+        outcomes[outcome] += 1
+        if first in PERFECT and second in PERFECT and outcome != expected:
+            errors.append(f"{first} vs {second} from {board} ended "
+                          f"{outcome}, perfect play gives {expected}")
+    return outcomes, totals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES),
+                        default=list(ENGINES))
+    parser.add_argument("--games", type=int, default=20,
+                        help="games per pair of engines")
+    parser.add_argument("--random-plies", type=int, default=2,
+                        help="random moves at the start of each game")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    errors = []
+    print(f"{'X':<10}{'O':<10}{'X wins':>7}{'draws':>7}{'O wins':>7}"
+          f"{'X moves/s':>11}{'O moves/s':>11}"
+          f"{'X nodes':>9}{'O nodes':>9}")
+    for first in args.engines:
+        for second in args.engines:
+            outcomes, totals = match(first, second, args.games,
+                                     args.random_plies, args.seed, errors)
+            rates = []
+            nodes = []
+            for mark in (ttt.X, ttt.O):
+                moves, seconds, searched = totals[mark]
+                rates.append(f"{moves / seconds:>11.0f}" if seconds
+                             else f"{'-':>11}")
+                nodes.append(f"{searched / moves:>9.1f}" if moves
+                             else f"{'-':>9}")
+            print(f"{first:<10}{second:<10}{outcomes[1]:>7}{outcomes[0]:>7}"
+                  f"{outcomes[-1]:>7}{''.join(rates)}{''.join(nodes)}",
+                  flush=True)
+
+    if errors:
+        for error in errors[:20]:
+            print(error)
+        sys.exit(f"{len(errors)} checks failed.")
+    print("All checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,21 @@ Tic Tac Toe Player
 
 import math
 import copy
+import os
+import threading
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Precomputed moves for every reachable position, see book.py
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "book.bin")
+BOOK_MAGIC = b"TTTBOOK1"
+# Book entries that are not a cell index
+BOOK_NO_MOVE = 9
+BOOK_MISSING = 255
+
 
 def initial_state():
     """
@@ -118,30 +128,174 @@ def utility(board):
         return 0
 
 
-def max_value(board, lowest_value):
+def ordered_actions(board):
+    """
+    Returns the possible actions, most promising first: winning moves,
+    then moves blocking a win of the opponent, then the center, the
+    corners and the edges.
+    """
+    which_turn = player(board)
+    opponent = O if which_turn == X else X
+
+    def completes_line(action, mark):
+        i, j = action
+        lines = [[(i, 0), (i, 1), (i, 2)], [(0, j), (1, j), (2, j)]]
+        if i == j:
+            lines.append([(0, 0), (1, 1), (2, 2)])
+        if i + j == 2:
+            lines.append([(0, 2), (1, 1), (2, 0)])
+        for line in lines:
+            if all(board[k][l] == mark for k, l in line if (k, l) != action):
+                return True
+        return False
+
+    def priority(action):
+        if completes_line(action, which_turn):
+            return 0
+        if completes_line(action, opponent):
+            return 1
+        if action == (1, 1):
+            return 2
+        if action[0] != 1 and action[1] != 1:
+            return 3
+        return 4
+
+    return sorted(actions(board), key=priority)
+
+
+# Number of positions visited by the last call to minimax
+nodes_explored = 0
+
+
+def max_value(board, alpha, beta, prune=True):
+    """
+    Returns the value of the board for X, who is to move.
+    With `prune`, returns as soon as the value reaches `beta`, so the
+    result is only exact if it lies strictly between `alpha` and `beta`.
+    """
+    global nodes_explored
+    nodes_explored += 1
     if terminal(board):
         return utility(board)
     highest_value = -math.inf
-    for action in actions(board):
-        current_value = min_value(result(board, action), highest_value)
+    for action in (ordered_actions(board) if prune else actions(board)):
+        current_value = min_value(result(board, action), alpha, beta, prune)
         highest_value = max(highest_value, current_value)
+        if prune:
+            if highest_value >= beta:
+                return highest_value
+            alpha = max(alpha, highest_value)
     return highest_value
 
 
-def min_value(board, highest_value):
+def min_value(board, alpha, beta, prune=True):
+    """
+    Returns the value of the board for X, with O to move.
+    With `prune`, returns as soon as the value drops to `alpha`.
+    """
+    global nodes_explored
+    nodes_explored += 1
     if terminal(board):
         return utility(board)
     lowest_value = math.inf
-    for action in actions(board):
-        current_value = max_value(result(board, action), lowest_value)
+    for action in (ordered_actions(board) if prune else actions(board)):
+        current_value = max_value(result(board, action), alpha, beta, prune)
         lowest_value = min(lowest_value, current_value)
+        if prune:
+            if lowest_value <= alpha:
+                return lowest_value
+            beta = min(beta, lowest_value)
     return lowest_value
 
 
-def minimax(board):
+def book_index(board):
+    """
+    Returns the base-3 index of a board in the opening book.
+    """
+    index = 0
+    for row in reversed(board):
+        for field in reversed(row):
+            index = index * 3 + (0 if field is EMPTY else
+                                 1 if field == X else 2)
+    return index
+
+
+def load_book(path=BOOK_PATH):
+    """
+    Returns the opening book stored at path, or None if there is none.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if data[:len(BOOK_MAGIC)] != BOOK_MAGIC or \
+            len(data) != len(BOOK_MAGIC) + 3 ** 9:
+        return None
+    return data[len(BOOK_MAGIC):]
+
+
+# Loaded on first use or by warmup, so importing this module is cheap
+opening_book = None
+book_lock = threading.Lock()
+
+# Stored in opening_book once loading found no book file
+NO_BOOK = object()
+
+
+def get_book():
+    """
+    Returns the opening book, loading it on first use.
+    Returns None if there is no book file.
+    """
+    global opening_book
+    if opening_book is None:
+        with book_lock:
+            if opening_book is None:
+                book = load_book()
+                opening_book = NO_BOOK if book is None else book
+    return None if opening_book is NO_BOOK else opening_book
+
+
+def warmup(background=False):
+    """
+    Loads the opening book, generating it in memory if book.bin is
+    missing, so later calls to minimax are answered in O(1).
+
+    With `background`, does so in a daemon thread and returns it.
+    """
+    def fill():
+        global opening_book
+        if get_book() is None:
+            from book import generate
+            entries, _ = generate()
+            with book_lock:
+                opening_book = entries
+
+    if background:
+        thread = threading.Thread(target=fill, daemon=True)
+        thread.start()
+        return thread
+    fill()
+
+
+def minimax(board, prune=True, use_book=True):
     """
     Returns the optimal action for the current player on the board.
+
+    Positions in the opening book are answered from it. Otherwise
+    the game tree is searched, with alpha-beta pruning unless `prune`
+    is False; either way the root actions are tried in order, so both
+    pick the same action as the book.
+    The number of positions visited is left in `nodes_explored`.
     """
+    global nodes_explored
+    nodes_explored = 0
+    book = get_book() if use_book else None
+    if book is not None:
+        entry = book[book_index(board)]
+        if entry != BOOK_MISSING:
+            return None if entry == BOOK_NO_MOVE else divmod(entry, 3)
     which_turn = player(board)
     possible_actions = actions(board)
 
@@ -152,7 +306,7 @@ def minimax(board):
             if best_score == 1:
                 return best_move
             new_board = result(board, possible_action)
-            score = min_value(new_board, best_score)
+            score = min_value(new_board, best_score, math.inf, prune)
             if score > best_score:
                 best_score = score
                 best_move = possible_action
@@ -165,11 +319,8 @@ def minimax(board):
             if best_score == -1:
                 return best_move
             new_board = result(board, possible_action)
-            score = max_value(new_board, best_score)
+            score = max_value(new_board, -math.inf, best_score, prune)
             if score < best_score:
                 best_score = score
                 best_move = possible_action
         return best_move
-
-
-minimax(initial_state())
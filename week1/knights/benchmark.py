@@ -0,0 +1,198 @@
+"""
+Benchmark of model_check on the knights puzzles
+
+    $ python benchmark.py [--repeat N] [--characters N ...]
+    $ python benchmark.py --check [N] [--seed N]
+
+Times checking every symbol of every puzzle in puzzle.py with each
+method of model_check, with the recursive enumeration model_check used
+before sentences were compiled and with one incremental KnowledgeBase
+per puzzle, checking that all of them agree. Times are per query.
+Then does the same on generated puzzles with more characters, skipping
+the enumerating methods once they have too many symbols to finish.
+
+With --check, instead compares the SAT solver and an incremental
+KnowledgeBase with the recursive enumeration on N random knowledge
+bases, exiting with status 1 on the first disagreement.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import puzzle
+from logic import (Symbol, Not, And, Or, Implication, Biconditional,
+                   model_check)
+from sat import KnowledgeBase
+
+# Most symbols each method is run on
+LIMITS = {"recursive": 16, "enumerate": 22, "vectorized": 26, "parallel": 22,
+          "sat": None, "incremental": None}
+
+
+def recursive_model_check(knowledge, query):
+    """
+    The original model_check: recursive enumeration of dict models,
+    walking the sentence tree for every model.
+    """
+    def check_all(knowledge, query, symbols, model):
+        if not symbols:
+            if knowledge.evaluate(model):
+                return query.evaluate(model)
+            return True
+        remaining = symbols.copy()
+        p = remaining.pop()
+        model_true = model.copy()
+        model_true[p] = True
+        model_false = model.copy()
+        model_false[p] = False
+        return (check_all(knowledge, query, remaining, model_true) and
+                check_all(knowledge, query, remaining, model_false))
+
+    symbols = set.union(knowledge.symbols(), query.symbols())
+    return check_all(knowledge, query, symbols, dict())
+
+
+def each(check, **options):
+    """
+    Returns a function answering a list of queries
+    by calling `check` on each of them.
+    """
+    return lambda knowledge, queries: [check(knowledge, query, **options)
+                                       for query in queries]
+
+
+# Functions answering a list of queries against one knowledge base
+METHODS = {
+    "recursive": each(recursive_model_check),
+    "enumerate": each(model_check, method="enumerate"),
+    "vectorized": each(model_check, method="vectorized"),
+    "parallel": each(model_check, method="parallel"),
+    "sat": each(model_check),
+    "incremental": lambda knowledge, queries:
+        KnowledgeBase(knowledge).entails_all(queries)
+}
+
+
+def generated(characters):
+    """
+    Returns a puzzle where each character says the next one is a knave
+    and the last one says the first one is a knight, and its symbols.
+    With an odd number of characters it has two solutions.
+    """
+    knights = [Symbol(f"{i} is a Knight") for i in range(characters)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(characters)]
+    knowledge = And()
+    for i in range(characters):
+        knowledge.add(Or(knights[i], knaves[i]))
+        knowledge.add(Not(And(knights[i], knaves[i])))
+        if i + 1 < characters:
+            knowledge.add(Biconditional(knights[i], knaves[i + 1]))
+        else:
+            knowledge.add(Biconditional(knights[i], knights[0]))
+    return knowledge, knights + knaves
+
+
+def random_sentence(rng, symbols, depth):
+    """
+    Returns a random sentence over `symbols` nested up to `depth` deep.
+    """
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(symbols)
+    kind = rng.choice([Not, And, Or, Implication, Biconditional])
+    if kind is Not:
+        return Not(random_sentence(rng, symbols, depth - 1))
+    if kind in (And, Or):
+        return kind(*[random_sentence(rng, symbols, depth - 1)
+                      for _ in range(rng.randint(0, 3))])
+    return kind(random_sentence(rng, symbols, depth - 1),
+                random_sentence(rng, symbols, depth - 1))
+
+
+def check(trials, seed):
+    """
+    Checks the SAT solver against the recursive enumeration on `trials`
+    random knowledge bases, each queried for every symbol and a few
+    random sentences. The same queries go to one KnowledgeBase to which
+    the sentences are added one at a time, so it reuses solver state.
+    """
+    rng = random.Random(seed)
+    for trial in range(trials):
+        symbols = [Symbol(f"s{i}") for i in range(rng.randint(1, 8))]
+        sentences = [random_sentence(rng, symbols, 3)
+                     for _ in range(rng.randint(1, 6))]
+        queries = symbols + [random_sentence(rng, symbols, 2)
+                             for _ in range(3)]
+        knowledge_base = KnowledgeBase()
+        for i, sentence in enumerate(sentences):
+            knowledge = And(*sentences[:i + 1])
+            knowledge_base.add(sentence)
+            expected = [recursive_model_check(knowledge, query)
+                        for query in queries]
+            for method, answers in [
+                ("sat", [model_check(knowledge, query) for query in queries]),
+                ("incremental", knowledge_base.entails_all(queries))
+            ]:
+                if answers != expected:
+                    sys.exit(f"{method} disagrees on trial {trial}: "
+                             f"{knowledge.formula()} entails "
+                             f"{[query.formula() for query in queries]}: "
+                             f"{expected}, not {answers}")
+    print(f"{trials} random knowledge bases checked.")
+
+
+def run(name, knowledge, symbols, repeat):
+    """
+    Prints the time per query of every method on one puzzle.
+    """
+    count = len(knowledge._symbols())
+    answers = {}
+    timings = []
+    for method, check in METHODS.items():
+        if LIMITS[method] is not None and count > LIMITS[method]:
+            timings.append(f"{'-':>15}")
+            continue
+        start = time.perf_counter()
+        for _ in range(repeat):
+            answers[method] = check(knowledge, symbols)
+        seconds = (time.perf_counter() - start) / (repeat * len(symbols))
+        timings.append(f"{seconds * 1000:>15.3f}")
+    if len(set(map(tuple, answers.values()))) > 1:
+        sys.exit(f"Methods disagree on {name}: {answers}")
+    print(f"{name:<16}{count:>8}{''.join(timings)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--characters", type=int, nargs="*",
+                        default=[5, 11, 101, 1001],
+                        help="characters of the generated puzzles")
+    parser.add_argument("--check", type=int, nargs="?", const=3000,
+                        metavar="N",
+                        help="check the SAT solver on N random knowledge "
+                             "bases instead")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the random knowledge bases")
+    args = parser.parse_args()
+
+    if args.check is not None:
+        check(args.check, args.seed)
+        return
+
+    symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+               puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    print(f"{'puzzle':<16}{'symbols':>8}"
+          + "".join(f"{method + ' ms':>15}" for method in METHODS))
+    for i, knowledge in enumerate([puzzle.knowledge0, puzzle.knowledge1,
+                                   puzzle.knowledge2, puzzle.knowledge3]):
+        run(f"Puzzle {i}", knowledge, symbols, args.repeat)
+    for characters in args.characters:
+        knowledge, generated_symbols = generated(characters)
+        run(f"{characters} characters", knowledge, generated_symbols[:6],
+            max(1, args.repeat // characters))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Compiled evaluation of logic.py sentences
+
+Symbols are interned to bit indexes, so a model is a single int whose
+bit i holds the value of symbol i, and a sentence is compiled once into
+a Python function of that int. Enumerating all models is then counting
+from 0 to 2 ** n - 1, without building a dict per model or walking the
+sentence tree.
+
+Sentences are compiled to one Python expression, turned into bytecode by
+the interpreter. Trees nested too deeply for the Python parser fall back
+to a tree of closures.
+
+The models of a knowledge base are found once and kept on it, so
+checking many queries against the same knowledge base only evaluates
+each query on those models.
+"""
+
+from itertools import islice
+
+from logic import Sentence, Symbol, Not, And, Or, Implication, Biconditional
+
+# Most models of a knowledge base kept in memory
+MODEL_LIMIT = 1 << 16
+
+
+def intern(*sentences):
+    """
+    Returns a dict mapping the name of every symbol in `sentences`
+    to its bit index, in sorted order of the names.
+    """
+    names = set()
+    for sentence in sentences:
+        names.update(sentence._symbols())
+    return {name: i for i, name in enumerate(sorted(names))}
+
+
+def source(sentence, index):
+    """
+    Returns a Python expression evaluating `sentence` on the model `m`.
+    """
+    if isinstance(sentence, Symbol):
+        return f"(m >> {index[sentence.name]} & 1)"
+    if isinstance(sentence, Not):
+        return f"(not {source(sentence.operand, index)})"
+    if isinstance(sentence, And):
+        if not sentence.conjuncts:
+            return "True"
+        return "(" + " and ".join(source(conjunct, index)
+                                  for conjunct in sentence.conjuncts) + ")"
+    if isinstance(sentence, Or):
+        if not sentence.disjuncts:
+            return "False"
+        return "(" + " or ".join(source(disjunct, index)
+                                 for disjunct in sentence.disjuncts) + ")"
+    if isinstance(sentence, Implication):
+        return (f"(not {source(sentence.antecedent, index)}"
+                f" or {source(sentence.consequent, index)})")
+    if isinstance(sentence, Biconditional):
+        # Every subexpression is 0, 1, False or True, so == compares
+        # truth values and each side is evaluated once
+        return (f"({source(sentence.left, index)}"
+                f" == {source(sentence.right, index)})")
+    raise TypeError(f"cannot compile {sentence}")
+
+
+def closure(sentence, index):
+    """
+    Returns a function evaluating `sentence` on a bit-packed model,
+    built from one closure per node.
+    """
+    if isinstance(sentence, Symbol):
+        bit = index[sentence.name]
+        return lambda m: m >> bit & 1
+    if isinstance(sentence, Not):
+        operand = closure(sentence.operand, index)
+        return lambda m: not operand(m)
+    if isinstance(sentence, And):
+        conjuncts = [closure(conjunct, index)
+                     for conjunct in sentence.conjuncts]
+        return lambda m: all(conjunct(m) for conjunct in conjuncts)
+    if isinstance(sentence, Or):
+        disjuncts = [closure(disjunct, index)
+                     for disjunct in sentence.disjuncts]
+        return lambda m: any(disjunct(m) for disjunct in disjuncts)
+    if isinstance(sentence, Implication):
+        antecedent = closure(sentence.antecedent, index)
+        consequent = closure(sentence.consequent, index)
+        return lambda m: not antecedent(m) or consequent(m)
+    if isinstance(sentence, Biconditional):
+        left = closure(sentence.left, index)
+        right = closure(sentence.right, index)
+        return lambda m: bool(left(m)) == bool(right(m))
+    raise TypeError(f"cannot compile {sentence}")
+
+
+def compile_sentence(sentence, index):
+    """
+    Returns a function of a bit-packed model returning
+    whether `sentence` is true in it.
+    """
+    if isinstance(sentence, Symbol):
+        bit = index[sentence.name]
+        return lambda m: m >> bit & 1 == 1
+    try:
+        return eval(f"lambda m: bool({source(sentence, index)})")
+    except (SyntaxError, RecursionError, MemoryError):
+        evaluate = closure(sentence, index)
+        return lambda m: bool(evaluate(m))
+
+
+def pack(model, index):
+    """
+    Returns the int encoding a dict from symbol names to truth values.
+    """
+    return sum(1 << i for name, i in index.items() if model[name])
+
+
+def unpack(m, index):
+    """
+    Returns the dict from symbol names to truth values encoded by `m`.
+    """
+    return {name: bool(m >> i & 1) for name, i in index.items()}
+
+
+def compiled(knowledge):
+    """
+    Returns the index of the symbols of `knowledge`, its compiled
+    function and the list of its models, or None instead of the list
+    if there are more than MODEL_LIMIT. Cached on the sentence until
+    any sentence changes.
+    """
+    cached = getattr(knowledge, "cached_program", None)
+    if cached is None or cached[0] != Sentence.version:
+        index = intern(knowledge)
+        evaluate = compile_sentence(knowledge, index)
+        models = list(islice(filter(evaluate, range(1 << len(index))),
+                             MODEL_LIMIT + 1))
+        if len(models) > MODEL_LIMIT:
+            models = None
+        cached = knowledge.cached_program = (Sentence.version, index,
+                                             evaluate, models)
+    return cached[1:]
+
+
+def extend(index, sentence):
+    """
+    Returns `index` with the symbols of `sentence` it lacks
+    added after the others.
+    """
+    extended = dict(index)
+    for name in sorted(sentence._symbols() - index.keys()):
+        extended[name] = len(extended)
+    return extended
+
+
+def counterexamples(knowledge, query):
+    """
+    Yields every model, as a dict, in which `knowledge`
+    is true and `query` is false.
+    """
+    index = intern(knowledge, query)
+    refutes = compile_sentence(And(knowledge, Not(query)), index)
+    for m in filter(refutes, range(1 << len(index))):
+        yield unpack(m, index)
+
+
+def entails(knowledge, query):
+    """
+    Returns True if `knowledge` entails `query`,
+    checking every model of their symbols.
+    """
+    index, _, models = compiled(knowledge)
+    extended = extend(index, query)
+    if models is None:
+        refutes = compile_sentence(And(knowledge, Not(query)), extended)
+        return not any(map(refutes, range(1 << len(extended))))
+
+    # Symbols only in the query take every value in every model
+    holds = compile_sentence(query, extended)
+    return all(holds(m | high)
+               for high in range(0, 1 << len(extended), 1 << len(index))
+               for m in models)
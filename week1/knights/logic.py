@@ -3,6 +3,17 @@ import itertools
 
 class Sentence():
 
+    # Slots instead of a __dict__ per sentence keep large knowledge bases
+    # small; cached_program is set by compiler.py
+    __slots__ = ("cached_version", "cached_symbols", "cached_hash_version",
+                 "cached_hash", "cached_program")
+
+    # Incremented whenever an And changes, invalidating cached
+    # symbols and hashes. It is shared by all sentences, so adding to
+    # any And throws away the cached symbols, hashes and compiled models
+    # (see compiler.py) of every sentence in the process
+    version = 0
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -13,7 +24,27 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self._symbols())
+
+    def _symbols(self):
+        """Returns the cached frozenset of all symbols, which is shared
+        and so is only used internally."""
+        return frozenset()
+
+    def cache_symbols(self, find):
+        """Returns the symbols `find` returns as a frozenset, shared
+        between calls and cached until a sentence changes."""
+        if getattr(self, "cached_version", -1) != Sentence.version:
+            self.cached_symbols = frozenset(find())
+            self.cached_version = Sentence.version
+        return self.cached_symbols
+
+    def cache_hash(self, compute):
+        """Returns the hash `compute` returns, cached until a sentence changes."""
+        if getattr(self, "cached_hash_version", -1) != Sentence.version:
+            self.cached_hash = compute()
+            self.cached_hash_version = Sentence.version
+        return self.cached_hash
 
     @classmethod
     def validate(cls, sentence):
@@ -43,6 +74,7 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
     def __init__(self, name):
         self.name = name
@@ -65,11 +97,13 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def _symbols(self):
+        return self.cache_symbols(lambda: {self.name})
 
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
@@ -78,7 +112,7 @@ class Not(Sentence):
         return isinstance(other, Not) and self.operand == other.operand
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self.cache_hash(lambda: hash(("not", hash(self.operand))))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,11 +123,13 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def _symbols(self):
+        return self.operand._symbols()
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
@@ -103,9 +139,9 @@ class And(Sentence):
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
     def __hash__(self):
-        return hash(
+        return self.cache_hash(lambda: hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        ))
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -116,6 +152,7 @@ class And(Sentence):
     def add(self, conjunct):
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
+        Sentence.version += 1
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,11 +163,15 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def _symbols(self):
+        return self.cache_symbols(lambda: frozenset().union(
+            *[conjunct._symbols() for conjunct in self.conjuncts]
+        ))
 
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
@@ -140,9 +181,9 @@ class Or(Sentence):
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
     def __hash__(self):
-        return hash(
+        return self.cache_hash(lambda: hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        ))
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,11 +198,15 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def _symbols(self):
+        return self.cache_symbols(lambda: frozenset().union(
+            *[disjunct._symbols() for disjunct in self.disjuncts]
+        ))
 
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
@@ -174,7 +219,9 @@ class Implication(Sentence):
                 and self.consequent == other.consequent)
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self.cache_hash(lambda: hash(
+            ("implies", hash(self.antecedent), hash(self.consequent))
+        ))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,11 +235,15 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def _symbols(self):
+        return self.cache_symbols(lambda: frozenset.union(
+            self.antecedent._symbols(), self.consequent._symbols()
+        ))
 
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
@@ -205,59 +256,175 @@ class Biconditional(Sentence):
                 and self.right == other.right)
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self.cache_hash(lambda: hash(
+            ("biconditional", hash(self.left), hash(self.right))
+        ))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+    def _symbols(self):
+        return self.cache_symbols(lambda: frozenset.union(
+            self.left._symbols(), self.right._symbols()
+        ))
+
+
+class SentenceFactory():
+    """Builds simplified sentences, sharing identical subsentences.
+
+    Every sentence returned by a factory is unique: building the same
+    sentence twice returns the same object, so it is stored once and
+    its hash computed once. Nested conjunctions and disjunctions are
+    flattened, repeated operands dropped, double negations removed and
+    sentences containing TRUE or FALSE, x and Not(x), or an
+    implication or biconditional between identical sides folded.
+    Operands are expected to come from the same factory, see intern,
+    and sentences built by a factory must not be changed with And.add.
+    """
+
+    def __init__(self):
+        # Maps every sentence built to itself
+        self.table = {}
+        # Maps the id of every sentence negated to its negation
+        self.negations = {}
+        # The constants, as an empty conjunction and an empty disjunction
+        self.true = self.unique(And())
+        self.false = self.unique(Or())
+
+    def unique(self, sentence):
+        """Returns the stored sentence equal to sentence, storing it if new."""
+        return self.table.setdefault(sentence, sentence)
+
+    def symbol(self, name):
+        return self.unique(Symbol(name))
+
+    def complement(self, sentence):
+        """Returns the negation of sentence if it was built, else None."""
+        if isinstance(sentence, Not):
+            return sentence.operand
+        return self.negations.get(id(sentence))
+
+    def negate(self, operand):
+        if operand is self.true:
+            return self.false
+        if operand is self.false:
+            return self.true
+        if isinstance(operand, Not):
+            return operand.operand
+        negation = self.negations.get(id(operand))
+        if negation is None:
+            negation = self.negations[id(operand)] = self.unique(Not(operand))
+        return negation
+
+    def connect(self, kind, operands, unit, zero):
+        """Returns the flattened and folded conjunction or disjunction."""
+        flat = []
+        seen = set()
+        for operand in operands:
+            Sentence.validate(operand)
+            nested = (operand.conjuncts if kind is And and
+                      isinstance(operand, And) else
+                      operand.disjuncts if kind is Or and
+                      isinstance(operand, Or) else [operand])
+            for child in nested:
+                if child is zero:
+                    return zero
+                if child is unit or id(child) in seen:
+                    continue
+                negation = self.complement(child)
+                if negation is not None and id(negation) in seen:
+                    return zero
+                seen.add(id(child))
+                flat.append(child)
+        if len(flat) == 1:
+            return flat[0]
+        return self.unique(kind(*flat))
+
+    def conjoin(self, *conjuncts):
+        return self.connect(And, conjuncts, self.true, self.false)
+
+    def disjoin(self, *disjuncts):
+        return self.connect(Or, disjuncts, self.false, self.true)
+
+    def implication(self, antecedent, consequent):
+        if (antecedent is self.false or consequent is self.true
+                or antecedent is consequent):
+            return self.true
+        if antecedent is self.true:
+            return consequent
+        if consequent is self.false:
+            return self.negate(antecedent)
+        return self.unique(Implication(antecedent, consequent))
+
+    def biconditional(self, left, right):
+        if left is right:
+            return self.true
+        if left is self.complement(right):
+            return self.false
+        for side, other in ((left, right), (right, left)):
+            if side is self.true:
+                return other
+            if side is self.false:
+                return self.negate(other)
+        return self.unique(Biconditional(left, right))
+
+    def intern(self, sentence, memo=None):
+        """Returns the simplified, shared version of any sentence."""
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        # Maps the ids of the nodes of the sentence interned so far to
+        # their results; only kept for this call, so the factory does
+        # not keep the sentences it is given alive
+        if memo is None:
+            memo = {}
+        key = id(sentence)
+        if key in memo:
+            return memo[key]
+        if isinstance(sentence, Not):
+            result = self.negate(self.intern(sentence.operand, memo))
+        elif isinstance(sentence, And):
+            result = self.conjoin(*[self.intern(conjunct, memo)
+                                    for conjunct in sentence.conjuncts])
+        elif isinstance(sentence, Or):
+            result = self.disjoin(*[self.intern(disjunct, memo)
+                                    for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            result = self.implication(self.intern(sentence.antecedent, memo),
+                                      self.intern(sentence.consequent, memo))
+        elif isinstance(sentence, Biconditional):
+            result = self.biconditional(self.intern(sentence.left, memo),
+                                        self.intern(sentence.right, memo))
         else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+            raise TypeError(f"cannot intern {sentence}")
+        memo[key] = result
+        return result
+
+
+def model_check(knowledge, query, method="sat"):
+    """Checks if knowledge base entails query.
+
+    The "sat" method decides it with the CDCL solver in sat.py,
+    "enumerate" checks every model of the symbols with the sentences
+    compiled by compiler.py, "vectorized" checks them in chunks
+    with NumPy (see vectorized.py) and "parallel" across a process
+    pool (see parallel.py).
+    """
+    if method == "sat":
+        from sat import entails
+    elif method == "enumerate":
+        from compiler import entails
+    elif method == "vectorized":
+        from vectorized import entails
+    elif method == "parallel":
+        from parallel import entails
+    else:
+        raise ValueError(f"unknown model checking method {method}")
+    return entails(knowledge, query)
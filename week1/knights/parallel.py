@@ -0,0 +1,200 @@
+"""
+Parallel model enumeration
+
+The models of n symbols are numbered as in compiler.py and split on the
+k highest bits into 2 ** k ranges of consecutive models, one per task of
+a process pool. Each worker compiles the sentence once. Looking for a
+counterexample stops as soon as one is found: the worker that finds it
+sets an Event shared by all workers through the pool initializer, so
+the others give up their ranges and queued tasks return at once.
+
+Only a few ranges per process are handed to the pool at a time, and the
+next one when a result is taken, so workers stay busy while results wait
+to be consumed but never run far ahead of the caller. count_models counts
+the models of a sentence and all_models yields them in order, one range
+at a time, so memory stays bounded by that window of ranges.
+"""
+
+import math
+import multiprocessing
+import os
+import threading
+from collections import deque
+from itertools import islice
+
+from compiler import compile_sentence, intern, unpack
+from logic import And, Not
+
+# Sentences with fewer symbols are checked in the calling process
+PARALLEL_BITS = 16
+
+# Models checked between two looks at the stop event
+BLOCK = 1 << 12
+
+# Ranges queued or being searched per process
+WINDOW = 2
+
+# Most models in one range, by default, are 2 ** RANGE_BITS
+RANGE_BITS = 16
+
+# Set in each worker by init_worker
+stop = None
+evaluate = None
+size = 0
+
+
+def init_worker(event, sentence, index, free_bits):
+    """
+    Compiles `sentence` in a worker, which searches ranges of
+    2 ** `free_bits` models and gives up once `event` is set.
+    """
+    global stop, evaluate, size
+    stop = event
+    evaluate = compile_sentence(sentence, index)
+    size = 1 << free_bits
+
+
+def blocks(prefix):
+    """
+    Yields the blocks of models in the range of `prefix`,
+    until the stop event is set.
+    """
+    start = prefix * size
+    for block in range(start, start + size, BLOCK):
+        if stop.is_set():
+            return
+        yield range(block, min(block + BLOCK, start + size))
+
+
+def find_model(prefix):
+    """
+    Returns the first model in the range of `prefix`, or None.
+    Sets the stop event when it finds one.
+    """
+    for block in blocks(prefix):
+        for m in filter(evaluate, block):
+            stop.set()
+            return m
+    return None
+
+
+def count_range(prefix):
+    """
+    Returns the number of models in the range of `prefix`.
+    """
+    return sum(1 for block in blocks(prefix) for _ in filter(evaluate, block))
+
+
+def list_range(prefix):
+    """
+    Returns the models in the range of `prefix`.
+    """
+    return [m for block in blocks(prefix) for m in filter(evaluate, block)]
+
+
+def get_context():
+    """
+    Returns the multiprocessing context, forking where possible.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+
+def create_pool(processes, event, sentence, index, free_bits):
+    """
+    Returns a process pool of workers searching `sentence`.
+    """
+    return get_context().Pool(processes, init_worker,
+                              (event, sentence, index, free_bits))
+
+
+def split(index, processes, split_bits):
+    """
+    Returns the number of bits to split on: `split_bits` if given,
+    else enough for four tasks per process and ranges of at most
+    2 ** RANGE_BITS models.
+    """
+    if split_bits is None:
+        processes = processes or os.cpu_count() or 1
+        split_bits = max(math.ceil(math.log2(4 * processes)),
+                         len(index) - RANGE_BITS)
+    return max(0, min(split_bits, len(index)))
+
+
+def search(sentence, index, task, processes=None, split_bits=None):
+    """
+    Yields the result of `task` on every range of the models of
+    `sentence`, in order of the ranges, keeping WINDOW ranges per
+    process in the pool.
+
+    Closing the generator sets the stop event, so the workers give up
+    their ranges, and waits for them. The pool is not terminated, as
+    killing workers while tasks are being queued can deadlock it.
+    """
+    if len(index) < PARALLEL_BITS:
+        init_worker(threading.Event(), sentence, index, len(index))
+        yield task(0)
+        return
+
+    processes = processes or os.cpu_count() or 1
+    bits = split(index, processes, split_bits)
+    event = get_context().Event()
+    pool = create_pool(processes, event, sentence, index, len(index) - bits)
+    try:
+        prefixes = iter(range(1 << bits))
+        pending = deque(pool.apply_async(task, (prefix,))
+                        for prefix in islice(prefixes, WINDOW * processes))
+        while pending:
+            result = pending.popleft().get()
+            prefix = next(prefixes, None)
+            if prefix is not None:
+                pending.append(pool.apply_async(task, (prefix,)))
+            yield result
+    finally:
+        event.set()
+        pool.close()
+        pool.join()
+
+
+def counterexample(knowledge, query, processes=None, split_bits=None):
+    """
+    Returns a model, as a dict, in which `knowledge` is true and
+    `query` is false, or None if `knowledge` entails `query`.
+    """
+    index = intern(knowledge, query)
+    results = search(And(knowledge, Not(query)), index, find_model,
+                     processes, split_bits)
+    try:
+        for m in results:
+            if m is not None:
+                return unpack(m, index)
+    finally:
+        results.close()
+    return None
+
+
+def entails(knowledge, query, processes=None, split_bits=None):
+    """
+    Returns True if `knowledge` entails `query`.
+    """
+    return counterexample(knowledge, query, processes, split_bits) is None
+
+
+def count_models(sentence, processes=None, split_bits=None):
+    """
+    Returns the number of models of `sentence` over its symbols.
+    """
+    return sum(search(sentence, intern(sentence), count_range, processes,
+                      split_bits))
+
+
+def all_models(sentence, processes=None, split_bits=None):
+    """
+    Yields every model of `sentence` over its symbols as a dict,
+    in the order of compiler.py.
+    """
+    index = intern(sentence)
+    for models in search(sentence, index, list_range, processes,
+                         split_bits):
+        for m in models:
+            yield unpack(m, index)
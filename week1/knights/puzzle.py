@@ -1,4 +1,5 @@
 from logic import *
+from sat import KnowledgeBase
 
 AKnight = Symbol("A is a Knight")
 AKnave = Symbol("A is a Knave")
@@ -80,8 +81,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            answers = KnowledgeBase(knowledge).entails_all(symbols)
+            for symbol, entailed in zip(symbols, answers):
+                if entailed:
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,466 @@
+"""
+SAT-based entailment for logic.py
+
+A sentence is converted to conjunctive normal form with the Tseitin
+transformation: every compound subsentence gets a fresh variable that is
+constrained to be equivalent to it, so the CNF grows linearly with the
+sentence instead of exponentially. Literals are non-zero integers, -v
+being the negation of variable v.
+
+Solver is a CDCL solver: unit propagation with two watched literals per
+clause, conflict analysis learning the first-UIP clause, non-chronological
+backjumping, activity-based branching with phase saving and restarts.
+`knowledge` entails `query` exactly when knowledge ∧ ¬query has no model.
+
+KnowledgeBase keeps one solver for a growing set of sentences and answers
+many queries against it, reusing learned clauses, entailed facts and the
+models found for earlier queries.
+"""
+
+import heapq
+
+from logic import Sentence, Symbol, Not, And, Or, Implication, Biconditional
+
+# Conflicts before the first restart, and the growth of that limit
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+# Decay of variable activities after each conflict
+ACTIVITY_DECAY = 0.95
+
+
+class Solver():
+
+    def __init__(self):
+        """
+        Creates a solver without variables or clauses.
+        """
+        # Indexed by variable; index 0 is unused
+        self.assigns = [0]      # 1 true, -1 false, 0 unassigned
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phase = [-1]
+        # Maps each literal to the clauses watching it
+        self.watches = {}
+        self.clauses = []
+        self.learnts = []
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.order = []
+        self.increment = 1.0
+        # False once the clauses are known to be unsatisfiable
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+
+    def new_var(self):
+        """
+        Adds a variable and returns it.
+        """
+        self.assigns.append(0)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phase.append(-1)
+        var = len(self.assigns) - 1
+        self.watches[var] = []
+        self.watches[-var] = []
+        heapq.heappush(self.order, (0.0, var))
+        return var
+
+    def value(self, literal):
+        """
+        Returns 1 if `literal` is true, -1 if it is false, 0 otherwise.
+        """
+        value = self.assigns[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, literals):
+        """
+        Adds the disjunction of `literals`. Returns False if the
+        clauses have become unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        clause = []
+        for literal in literals:
+            value = self.value(literal)
+            if value == 1 or -literal in clause:
+                return True
+            if value == 0 and literal not in clause:
+                clause.append(literal)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.watches[clause[0]].append(clause)
+            self.watches[clause[1]].append(clause)
+            self.clauses.append(clause)
+        return self.ok
+
+    def assign(self, literal, reason):
+        """
+        Makes `literal` true at the current decision level.
+        """
+        var = abs(literal)
+        self.assigns[var] = 1 if literal > 0 else -1
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses.
+        Returns a conflicting clause, or None.
+        """
+        trail = self.trail
+        assigns = self.assigns
+        while self.qhead < len(trail):
+            false = -trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            watching = self.watches[false]
+            kept = []
+            i = 0
+            while i < len(watching):
+                clause = watching[i]
+                i += 1
+                # Keep the false literal second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                if (assigns[first] if first > 0 else -assigns[-first]) == 1:
+                    kept.append(clause)
+                    continue
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (assigns[literal] if literal > 0
+                            else -assigns[-literal]) != -1:
+                        clause[1], clause[k] = literal, false
+                        self.watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if (assigns[first] if first > 0
+                            else -assigns[-first]) == -1:
+                        kept.extend(watching[i:])
+                        self.watches[false] = kept
+                        self.qhead = len(trail)
+                        return clause
+                    self.assign(first, clause)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from `conflict`, asserting
+        literal first, and the level to backjump to.
+        """
+        level = len(self.trail_lim)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        literal = None
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                var = abs(other)
+                if var in seen or self.levels[var] == 0:
+                    continue
+                seen.add(var)
+                self.bump(var)
+                if self.levels[var] == level:
+                    pending += 1
+                else:
+                    learnt.append(other)
+            # Walk back to the next literal of this level in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+        learnt[0] = -literal
+
+        backjump = 0
+        if len(learnt) > 1:
+            deepest = max(range(1, len(learnt)),
+                          key=lambda i: self.levels[abs(learnt[i])])
+            learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+            backjump = self.levels[abs(learnt[1])]
+        return learnt, backjump
+
+    def bump(self, var):
+        """
+        Raises the activity of a variable involved in a conflict.
+        """
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, len(self.assigns))]
+            heapq.heapify(self.order)
+        else:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def backtrack(self, level):
+        """
+        Undoes every assignment above decision `level`.
+        """
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            var = abs(literal)
+            self.phase[var] = self.assigns[var]
+            self.assigns[var] = 0
+            self.reasons[var] = None
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = start
+
+    def pick(self):
+        """
+        Returns the unassigned variable with the highest activity,
+        or None if every variable is assigned.
+        """
+        while self.order:
+            activity, var = heapq.heappop(self.order)
+            if self.assigns[var] == 0 and -activity == self.activity[var]:
+                return var
+        for var in range(1, len(self.assigns)):
+            if self.assigns[var] == 0:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses have a model in which every literal
+        of `assumptions` is true, leaving it in `model`. Clauses learned
+        along the way are kept for later calls.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        restart = RESTART_FIRST
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, backjump = self.analyze(conflict)
+                self.backtrack(backjump)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.watches[learnt[0]].append(learnt)
+                    self.watches[learnt[1]].append(learnt)
+                    self.learnts.append(learnt)
+                    self.assign(learnt[0], learnt)
+                self.increment /= ACTIVITY_DECAY
+                continue
+
+            if conflicts >= restart:
+                conflicts = 0
+                restart *= RESTART_GROWTH
+                self.backtrack(0)
+                continue
+
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value == -1:
+                    self.backtrack(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value == 0:
+                    self.assign(literal, None)
+                continue
+
+            var = self.pick()
+            if var is None:
+                self.model = self.assigns.copy()
+                self.backtrack(0)
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.assign(var if self.phase[var] == 1 else -var, None)
+
+
+class Encoder():
+
+    def __init__(self, solver=None):
+        """
+        Converts sentences to clauses of `solver`.
+        """
+        self.solver = Solver() if solver is None else solver
+        # Maps symbol names to variables
+        self.variables = {}
+        # Maps compound sentences to the literal standing for them
+        self.literals = {}
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding the clauses
+        defining it the first time it is seen.
+        """
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.variables:
+                self.variables[sentence.name] = self.solver.new_var()
+            return self.variables[sentence.name]
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        add = self.solver.add_clause
+        if isinstance(sentence, (And, Or)):
+            children = [self.literal(child) for child in
+                        (sentence.conjuncts if isinstance(sentence, And)
+                         else sentence.disjuncts)]
+            var = self.solver.new_var()
+            # For Or, the clauses of And over the negations, negated
+            sign = 1 if isinstance(sentence, And) else -1
+            for child in children:
+                add([-sign * var, sign * child])
+            add([sign * var] + [-sign * child for child in children])
+            literal = var
+        elif isinstance(sentence, Implication):
+            literal = self.literal(Or(Not(sentence.antecedent),
+                                      sentence.consequent))
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            var = self.solver.new_var()
+            add([-var, -left, right])
+            add([-var, left, -right])
+            add([var, left, right])
+            add([var, -left, -right])
+            literal = var
+        else:
+            raise TypeError(f"cannot convert {sentence} to CNF")
+        self.literals[sentence] = literal
+        return literal
+
+    def add(self, sentence):
+        """
+        Adds `sentence` as a fact. Conjunctions and disjunctions at the
+        top level become clauses directly, without a Tseitin variable.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause([self.literal(disjunct)
+                                    for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.solver.add_clause([-self.literal(sentence.antecedent),
+                                    self.literal(sentence.consequent)])
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+    def model(self):
+        """
+        Returns the model found by the last successful solve as a dict
+        from symbol names to truth values.
+        """
+        return {name: self.solver.model[var] == 1
+                for name, var in self.variables.items()}
+
+
+class KnowledgeBase():
+
+    def __init__(self, *sentences):
+        """
+        Creates a knowledge base holding `sentences`. Sentences are
+        converted to clauses of one solver as they are added, and its
+        learned clauses and entailed facts are kept across queries.
+        """
+        self.encoder = Encoder()
+        # Maps queries to whether they are entailed
+        self.answers = {}
+        # Models of the knowledge base found while answering queries
+        self.models = []
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Adds `sentence` to the knowledge base. Entailed queries stay
+        entailed, the other ones are checked again.
+        """
+        Sentence.validate(sentence)
+        self.encoder.add(sentence)
+        self.answers = {query: True for query, entailed
+                        in self.answers.items() if entailed}
+        self.models = []
+
+    def refuted(self, literal):
+        """
+        Returns True if `literal` is false in a model found earlier.
+        """
+        return any(abs(literal) < len(model) and
+                   (model[abs(literal)] == 1) != (literal > 0)
+                   for model in self.models)
+
+    def entails(self, query):
+        """
+        Returns True if the knowledge base entails `query`.
+        """
+        return self.entails_all([query])[0]
+
+    def entails_all(self, queries):
+        """
+        Returns for each query of `queries` whether the knowledge base
+        entails it. All queries are encoded first, so a model refuting
+        one query settles every other query it refutes too.
+        """
+        literals = [self.encoder.literal(query) for query in queries]
+        solver = self.encoder.solver
+        for query, literal in zip(queries, literals):
+            if query in self.answers:
+                continue
+            if self.refuted(literal):
+                self.answers[query] = False
+            elif solver.solve([-literal]):
+                self.models.append(solver.model)
+                self.answers[query] = False
+            else:
+                # Later queries can propagate it instead of deriving it
+                solver.add_clause([literal])
+                self.answers[query] = True
+        return [self.answers[query] for query in queries]
+
+
+def entails(knowledge, query):
+    """
+    Returns True if `knowledge` entails `query`.
+    """
+    encoder = Encoder()
+    encoder.add(knowledge)
+    return not encoder.solver.solve([-encoder.literal(query)])
@@ -0,0 +1,95 @@
+"""
+Vectorized truth-table checking with NumPy
+
+The models of n symbols are numbered 0 to 2 ** n - 1 as in compiler.py
+and evaluated in chunks of 2 ** chunk_bits consecutive models. Within a
+chunk the low symbols are boolean columns, the same for every chunk, and
+the high symbols are constants, so a sentence is evaluated on a whole
+chunk with a few array operations per node. Memory depends on the chunk
+size and the size of the sentence, not on the number of symbols.
+"""
+
+from functools import reduce
+
+import numpy as np
+
+from compiler import intern, unpack
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+# Models evaluated at once are 2 ** CHUNK_BITS
+CHUNK_BITS = 16
+
+
+def evaluate(sentence, columns, cache):
+    """
+    Returns the truth value of `sentence` on every model of a chunk,
+    as a boolean array or a single bool, given `columns`, the value of
+    each symbol on the chunk. `cache` holds the values of the nodes
+    already evaluated on it.
+    """
+    key = id(sentence)
+    if key in cache:
+        return cache[key]
+    if isinstance(sentence, Symbol):
+        value = columns[sentence.name]
+    elif isinstance(sentence, Not):
+        value = np.logical_not(evaluate(sentence.operand, columns, cache))
+    elif isinstance(sentence, And):
+        value = reduce(np.logical_and,
+                       (evaluate(conjunct, columns, cache)
+                        for conjunct in sentence.conjuncts), True)
+    elif isinstance(sentence, Or):
+        value = reduce(np.logical_or,
+                       (evaluate(disjunct, columns, cache)
+                        for disjunct in sentence.disjuncts), False)
+    elif isinstance(sentence, Implication):
+        value = np.logical_or(
+            np.logical_not(evaluate(sentence.antecedent, columns, cache)),
+            evaluate(sentence.consequent, columns, cache)
+        )
+    elif isinstance(sentence, Biconditional):
+        value = np.equal(evaluate(sentence.left, columns, cache),
+                         evaluate(sentence.right, columns, cache))
+    else:
+        raise TypeError(f"cannot evaluate {sentence}")
+    cache[key] = value
+    return value
+
+
+def check(knowledge, query, limit=0, chunk_bits=CHUNK_BITS):
+    """
+    Returns whether `knowledge` entails `query`, and a list of up to
+    `limit` models, as dicts, in which `knowledge` is true and `query`
+    is false.
+    """
+    index = intern(knowledge, query)
+    low = min(len(index), chunk_bits)
+    size = 1 << low
+    offsets = np.arange(size)
+    low_columns = {name: (offsets >> i & 1).astype(bool)
+                   for name, i in index.items() if i < low}
+    refutes = And(knowledge, Not(query))
+
+    entailed = True
+    counterexamples = []
+    for base in range(0, 1 << len(index), size):
+        columns = dict(low_columns)
+        for name, i in index.items():
+            if i >= low:
+                columns[name] = bool(base >> i & 1)
+        found = np.broadcast_to(evaluate(refutes, columns, {}), (size,))
+        if not found.any():
+            continue
+        entailed = False
+        for offset in np.flatnonzero(found)[:limit - len(counterexamples)]:
+            counterexamples.append(unpack(base + int(offset), index))
+        if len(counterexamples) >= limit:
+            break
+    return entailed, counterexamples
+
+
+def entails(knowledge, query):
+    """
+    Returns True if `knowledge` entails `query`.
+    """
+    return check(knowledge, query)[0]